@@ -2,24 +2,65 @@ import os
 from flask import Flask, redirect, url_for
 from flask_wtf.csrf import generate_csrf
 from .extensions import db, migrate, login_manager, csrf
-from .models.settings import AppSetting, GlobalSettings
+from .config import Config, _normalize
+from .utils.engine_profiles import engine_options, init_engine_profiles
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    app.config.from_object(Config)
 
     # Basic config
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-change-me")
 
     # Database URL
-    db_uri = os.environ.get("DATABASE_URL", "sqlite:///db.sqlite3")
-    if db_uri.startswith("postgres://"):
-        db_uri = db_uri.replace("postgres://", "postgresql+psycopg://", 1)
+    db_uri = _normalize(os.environ.get("SQLALCHEMY_DATABASE_URI") or os.environ.get("DATABASE_URL")) \
+        or "sqlite:///db.sqlite3"
     app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Optional read replica for reports/exports; falls back to the primary while it lags too far behind
+    replica_uri = _normalize(os.environ.get("DATABASE_REPLICA_URL"))
+    app.config["REPLICA_MAX_LAG_SECONDS"] = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "30"))
+    app.config["REPLICA_LAG_CHECK_SECONDS"] = float(os.environ.get("REPLICA_LAG_CHECK_SECONDS", "10"))
+
+    # ChangeLog writes: "inline" (same transaction) or "deferred" (background writer after commit)
+    app.config["AUDIT_FLUSH_MODE"] = os.environ.get("AUDIT_FLUSH_MODE", "inline")
+
+    # Background exports: "local" runs jobs inside the web process, "worker" leaves them for `flask export-worker`
+    app.config["EXPORT_JOB_MODE"] = os.environ.get("EXPORT_JOB_MODE", "local")
+    app.config["EXPORT_JOB_THREADS"] = int(os.environ.get("EXPORT_JOB_THREADS", "1"))
+    app.config["PDF_PROCESSES"] = int(os.environ.get("PDF_PROCESSES", "2"))
+    app.config["EXPORT_DIR"] = os.environ.get("EXPORT_DIR", os.path.join(app.instance_path, "exports"))
+    # Seconds a background job may run (or a re-costing run go without a checkpoint) before it counts as abandoned
+    app.config["JOB_STALE_SECONDS"] = int(os.environ.get("JOB_STALE_SECONDS", "900"))
+
+    # Rendered report exports, reused while the underlying data is unchanged (0 disables)
+    app.config["EXPORT_CACHE_DIR"] = os.environ.get("EXPORT_CACHE_DIR", os.path.join(app.instance_path, "export_cache"))
+    app.config["EXPORT_CACHE_MAX_BYTES"] = int(os.environ.get("EXPORT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # zlib level for the .csv.gz report export (1 fastest .. 9 smallest)
+    app.config["EXPORT_GZIP_LEVEL"] = int(os.environ.get("EXPORT_GZIP_LEVEL", "6"))
+
+    # Create tables and default settings rows in create_app (local development). Deployments set 0 and
+    # run `flask bootstrap` once per release, so concurrent workers don't race on it or wait on the DB
+    app.config["BOOTSTRAP_ON_START"] = os.environ.get("BOOTSTRAP_ON_START", "1") == "1"
+
+    # Seconds current_user's role claim in the session is trusted before the User row is re-read (0: every request)
+    app.config["IDENTITY_CLAIM_TTL"] = int(os.environ.get("IDENTITY_CLAIM_TTL", "10"))
+
+    # Per-request SQL/render timing (Server-Timing header, /admin/performance)
+    app.config["PERF_INSTRUMENTATION"] = os.environ.get("PERF_INSTRUMENTATION", "1") == "1"
+    app.config["SLOW_REQUEST_MS"] = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+    app.config["PERF_RING_SIZE"] = int(os.environ.get("PERF_RING_SIZE", "200"))
+
+    # Pool sizing, statement timeouts and SQLite pragmas for the selected engine profile
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(db_uri, app.config)
+    if replica_uri:
+        app.config["SQLALCHEMY_BINDS"] = {"replica": {"url": replica_uri, **engine_options(replica_uri, app.config)}}
+
     # Init extensions
     db.init_app(app)
+    init_engine_profiles(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
@@ -32,40 +73,32 @@ def create_app() -> Flask:
     from .projects.routes import projects_bp
     from .timesheets.routes import timesheets_bp
     from .admin.routes import admin_bp
+    from .reports.routes import reports_bp
 
     app.register_blueprint(auth_bp)
-    app.register_blueprint(projects_bp)
-    app.register_blueprint(timesheets_bp)
+    app.register_blueprint(projects_bp, url_prefix="/projects")
+    app.register_blueprint(timesheets_bp, url_prefix="/timesheets")
     app.register_blueprint(admin_bp)
+    app.register_blueprint(reports_bp, url_prefix="/reports")
+
+    from .cli import register_cli
+    register_cli(app)
+
+    from .utils.instrumentation import init_instrumentation
+    init_instrumentation(app)
+
+    from .utils.identity import init_identity
+    init_identity(app)
 
     # Root -> login
     @app.route("/")
     def root():
         return redirect(url_for("auth.login"))
 
-    # Ensure tables + default settings exist
-    with app.app_context():
-        db.create_all()
-        _ensure_default_settings()
+    # Tables + default settings; deployments run `flask bootstrap` once instead (see utils/bootstrap.py)
+    if app.config["BOOTSTRAP_ON_START"]:
+        from .utils.bootstrap import bootstrap_database
+        with app.app_context():
+            bootstrap_database()
 
     return app
-
-
-def _ensure_default_settings() -> None:
-    """Create minimal default rows if they don't exist yet."""
-    gs = GlobalSettings.query.first()
-    if not gs:
-        gs = GlobalSettings(burden_percent=0.0)
-        db.session.add(gs)
-
-    s = AppSetting.query.first()
-    if not s:
-        s = AppSetting(
-            overtime_threshold_hours_per_day=8,
-            overtime_multiplier=1.5,
-            doubletime_threshold_hours_per_day=12,
-            doubletime_multiplier=2.0,
-        )
-        db.session.add(s)
-
-    db.session.commit()
@@ -1,8 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from flask_login import login_required
+from datetime import datetime
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import current_user, login_required
 from ..utils.security import admin_required
 from ..extensions import db
 from ..models.settings import AppSetting, GlobalSettings
+from ..utils.rollups import refresh_unsubmitted_rollups
+from ..utils.settings_cache import bump_settings_version
+from ..utils.instrumentation import slow_requests
+from ..utils.jobs import enqueue_job
+from ..utils.recost import is_resumable, start_recost
+from ..models.recost import RecostRun
 
 admin_bp = Blueprint(
     "admin",
@@ -51,7 +58,68 @@ def update_settings():
         gs = GlobalSettings()
         db.session.add(gs)
     gs.burden_percent = float(request.form.get("burden_percent", 0))
+    db.session.flush()
+    bump_settings_version()
+    # Unsubmitted entries are costed with the live settings, so their rollup rows follow them
+    refresh_unsubmitted_rollups()
 
     db.session.commit()
     flash("Settings updated.", "success")
     return redirect(url_for("admin.dashboard"))
+
+
+@admin_bp.get("/performance")
+@login_required
+@admin_required
+def performance():
+    # Slow requests seen by this worker process (in-memory ring buffer)
+    return render_template(
+        "admin/performance.html",
+        requests=slow_requests(),
+        slow_ms=current_app.config.get("SLOW_REQUEST_MS", 500),
+    )
+
+
+@admin_bp.get("/recost")
+@login_required
+@admin_required
+def recost():
+    runs = RecostRun.query.order_by(RecostRun.id.desc()).limit(50).all()
+    return render_template("admin/recost.html", runs=runs, is_resumable=is_resumable)
+
+
+@admin_bp.post("/recost")
+@login_required
+@admin_required
+def start_recost_run():
+    # Re-cost submitted entries in the background after a back-dated wage/burden correction
+    try:
+        start = datetime.strptime(request.form.get("start", ""), "%Y-%m-%d").date()
+        end = datetime.strptime(request.form.get("end", ""), "%Y-%m-%d").date()
+    except ValueError:
+        flash("Start and end dates are required.", "danger")
+        return redirect(url_for("admin.recost"))
+    user_id = request.form.get("user_id") or None
+    burden = request.form.get("burden_percent") or None
+    try:
+        run = start_recost(start, end, user_id=int(user_id) if user_id else None,
+                           burden_percent=float(burden) if burden else None, created_by=current_user.id)
+    except ValueError as exc:
+        flash(str(exc), "danger")
+        return redirect(url_for("admin.recost"))
+    enqueue_job("recost", {"run_id": run.id}, current_user.id)
+    flash(f"Re-costing run {run.id} queued ({run.total} entries).", "success")
+    return redirect(url_for("admin.recost"))
+
+
+@admin_bp.post("/recost/<int:run_id>/resume")
+@login_required
+@admin_required
+def resume_recost_run(run_id):
+    run = db.session.get(RecostRun, run_id)
+    if run is None or not is_resumable(run):
+        flash("Only failed or stalled runs can be resumed.", "danger")
+    else:
+        enqueue_job("recost", {"run_id": run.id}, current_user.id)
+        flash(f"Re-costing run {run.id} resumed from entry {run.processed + 1}.", "success")
+    return redirect(url_for("admin.recost"))
@@ -17,3 +17,8 @@ def login():
             return redirect(nxt or url_for("projects.index"))  # pick your landing page
         flash("Invalid email or password.", "danger")
     return render_template("auth/login.html", form=form)
+
+@auth_bp.route("/logout")
+def logout():
+    logout_user()
+    return redirect(url_for("auth.login"))
@@ -0,0 +1,189 @@
+import time
+from datetime import date, datetime, timedelta
+import click
+from flask import Flask
+from .extensions import db
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def register_cli(app: Flask) -> None:
+    """Attach maintenance commands to `flask --app wsgi ...`."""
+
+    @app.cli.command("bootstrap")
+    @click.option("--migrate", is_flag=True, help="Apply the schema migrations first (release step).")
+    def bootstrap_cmd(migrate):
+        """Create missing tables and the default settings rows (idempotent; run once per deploy)."""
+        from .utils.bootstrap import bootstrap_database, migrate_database
+
+        if migrate:
+            migrate_database()
+        created = bootstrap_database()
+        click.echo(f"Created default {', '.join(created)}." if created else "Database already bootstrapped.")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--start", help="First day (YYYY-MM-DD); defaults to the earliest entry.")
+    @click.option("--end", help="Last day (YYYY-MM-DD); defaults to today.")
+    def rebuild_rollups_cmd(start, end):
+        """Backfill the daily/weekly labor rollup tables."""
+        from .models.archive import TimeEntryArchive
+        from .models.timeentry import TimeEntry
+        from .utils.rollups import rebuild_rollups
+
+        earliest = [d for d in (db.session.query(db.func.min(TimeEntry.work_date)).scalar(),
+                                db.session.query(db.func.min(TimeEntryArchive.work_date)).scalar()) if d]
+        start = _parse_date(start) or (min(earliest) if earliest else None)
+        end = _parse_date(end) or date.today()
+        if start is None:
+            click.echo("No time entries; nothing to rebuild.")
+            return
+        n = rebuild_rollups(start, end)
+        db.session.commit()
+        click.echo(f"Rebuilt {n} daily rollup rows for {start} to {end}.")
+
+    @app.cli.command("compact-audit")
+    @click.option("--older-than-days", default=90, show_default=True,
+                  help="Compact autosave rows older than this many days.")
+    def compact_audit_cmd(older_than_days):
+        """Drop old autosave ChangeLog rows, keeping the latest one per record."""
+        from .utils.changes import compact_autosave_log
+
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        n = compact_autosave_log(cutoff)
+        click.echo(f"Deleted {n} autosave rows older than {cutoff:%Y-%m-%d}.")
+
+    @app.cli.command("purge-empty-entries")
+    def purge_empty_entries_cmd():
+        """Delete unsubmitted zero-hour entries with no notes (legacy timesheet stub rows)."""
+        from .models.timeentry import TimeEntry
+
+        n = (TimeEntry.query
+             .filter(TimeEntry.is_submitted == False,
+                     db.func.coalesce(TimeEntry.hours, 0.0) == 0.0,
+                     db.func.coalesce(TimeEntry.notes, "") == "")
+             .delete(synchronize_session=False))
+        db.session.commit()
+        click.echo(f"Deleted {n} empty entries.")
+
+    @app.cli.command("archive-rollover")
+    @click.option("--through", required=True, help="Last day to archive (YYYY-MM-DD), e.g. the end of the "
+                                                   "last closed pay period.")
+    @click.option("--dry-run", is_flag=True, help="List the periods and entry counts without moving anything.")
+    def archive_rollover_cmd(through, dry_run):
+        """Move submitted entries of closed periods into the archive table, one month per transaction."""
+        from .models.timeentry import TimeEntry
+        from .utils.archive import archive_period, rollover_periods
+        from .utils.changes import flush_deferred_changes
+
+        through = _parse_date(through)
+        if through >= date.today():
+            raise click.ClickException("--through must be a past day.")
+        try:
+            periods = rollover_periods(through)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+        total = 0
+        for start, end in periods:
+            if dry_run:
+                n = TimeEntry.query.filter(TimeEntry.work_date.between(start, end)).count()
+            else:
+                n = archive_period(start, end)
+            total += n
+            click.echo(f"  {start} to {end}: {n} entries{' to move' if dry_run else ' moved'}")
+        if dry_run:
+            click.echo(f"Would archive {total} entries through {through}.")
+        else:
+            flush_deferred_changes()
+            click.echo(f"Archived {total} entries; closed through {through}.")
+
+    @app.cli.command("export-worker")
+    @click.option("--once", is_flag=True, help="Run the queued jobs once and exit.")
+    @click.option("--interval", default=2.0, show_default=True, help="Seconds between polls.")
+    def export_worker_cmd(once, interval):
+        """Process queued background export jobs."""
+        from .utils.changes import flush_deferred_changes
+        from .utils.jobs import run_pending_jobs
+        from .reports import routes as _  # noqa: F401 (registers the report job handlers)
+        from .utils import recost as _recost  # noqa: F401 (registers the re-costing job handler)
+
+        try:
+            while True:
+                n = run_pending_jobs()
+                if n:
+                    click.echo(f"Ran {n} export jobs.")
+                if once:
+                    return
+                db.session.remove()
+                time.sleep(interval)
+        finally:
+            flush_deferred_changes()
+
+    @app.cli.command("purge-export-jobs")
+    @click.option("--older-than-hours", default=24, show_default=True)
+    def purge_export_jobs_cmd(older_than_hours):
+        """Delete finished export jobs and their files."""
+        from .utils.jobs import purge_jobs
+
+        n = purge_jobs(datetime.utcnow() - timedelta(hours=older_than_hours))
+        db.session.commit()
+        click.echo(f"Deleted {n} export jobs.")
+
+    @app.cli.command("check-query-plans")
+    @click.option("--verbose", is_flag=True, help="Print every plan, not just failures.")
+    def check_query_plans_cmd(verbose):
+        """EXPLAIN the hot report/timesheet queries; exit 1 if any falls back to a full scan."""
+        from .utils.query_plans import check_query_plans
+
+        failed = 0
+        for name, scans, lines in check_query_plans():
+            status = "FULL SCAN" if scans else "ok"
+            click.echo(f"{status:9}  {name}")
+            if scans or verbose:
+                for line in lines:
+                    click.echo(f"           {line}")
+            failed += bool(scans)
+        if failed:
+            raise SystemExit(1)
+
+    @app.cli.command("recost")
+    @click.option("--start", help="First day (YYYY-MM-DD).")
+    @click.option("--end", help="Last day (YYYY-MM-DD).")
+    @click.option("--user-id", type=int, help="Only this user's entries (default: everyone).")
+    @click.option("--burden", type=float, help="Apply this burden %% instead of each entry's snapshot burden.")
+    @click.option("--chunk-size", default=5000, show_default=True)
+    @click.option("--resume", "resume_id", type=int, help="Continue an interrupted run from its checkpoint.")
+    def recost_cmd(start, end, user_id, burden, chunk_size, resume_id):
+        """Recompute submitted entries' cost snapshots after a back-dated wage/burden correction."""
+        from .models.recost import RecostRun
+        from .utils.changes import flush_deferred_changes
+        from .utils.recost import run_recost, start_recost
+
+        if resume_id:
+            run = db.session.get(RecostRun, resume_id)
+            if run is None or run.status == "done":
+                raise click.ClickException(f"No unfinished re-costing run {resume_id}.")
+        else:
+            start, end = _parse_date(start), _parse_date(end)
+            if not start or not end:
+                raise click.ClickException("--start and --end are required (or --resume).")
+            try:
+                run = start_recost(start, end, user_id=user_id, burden_percent=burden)
+            except ValueError as exc:
+                raise click.ClickException(str(exc))
+        click.echo(f"Run {run.id}: {run.total} submitted entries, {run.processed} already done.")
+
+        def progress(run, chunk):
+            click.echo(f"  {run.processed}/{run.total} entries, {chunk['changed']} changed in this chunk "
+                       f"(labor {chunk['labor_delta']:+.2f}, total {chunk['total_delta']:+.2f})")
+
+        t0 = time.perf_counter()
+        try:
+            run_recost(run, chunk_rows=chunk_size, progress=progress)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+        finally:
+            flush_deferred_changes()
+        click.echo(f"Run {run.id} done in {time.perf_counter() - t0:.1f}s: {run.changed} entries changed, "
+                   f"labor {run.labor_delta:+.2f}, total {run.total_delta:+.2f}.")
@@ -19,11 +19,27 @@ class Config:
 
     # Prefer SQLALCHEMY_DATABASE_URI; fall back to DATABASE_URL (used by Render)
     _url = os.environ.get("SQLALCHEMY_DATABASE_URI") or os.environ.get("DATABASE_URL")
-    SQLALCHEMY_DATABASE_URI = _normalize(_url) or "sqlite:///app.db"
+    SQLALCHEMY_DATABASE_URI = _normalize(_url) or "sqlite:///db.sqlite3"
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     # Keeps pooled connections healthy in PaaS environments
     SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
 
+    # Engine profile (see app/utils/engine_profiles.py): auto | postgres | sqlite | none
+    DB_ENGINE_PROFILE = os.environ.get("DB_ENGINE_PROFILE", "auto")
+    # Pool sizing: per-process pool = GUNICORN_THREADS + EXPORT_JOB_THREADS unless DB_POOL_SIZE is set,
+    # capped so WEB_CONCURRENCY workers fit in DB_MAX_CONNECTIONS
+    WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", "1"))
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "0"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "2"))
+    DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", "0"))
+    # Postgres: default and report statement timeouts (ms, 0 = none), psycopg prepare threshold
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    REPORT_STATEMENT_TIMEOUT_MS = int(os.environ.get("REPORT_STATEMENT_TIMEOUT_MS", "120000"))
+    DB_PREPARE_THRESHOLD = os.environ.get("DB_PREPARE_THRESHOLD", "5")
+    # SQLite: how long a writer waits for the lock before "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
     ALLOWED_EMAIL_DOMAIN = os.environ.get("ALLOWED_EMAIL_DOMAIN", "gsrconstruct.com")
     DAILY_TOLERANCE_MINUTES = float(os.environ.get("DAILY_TOLERANCE_MINUTES", "6"))
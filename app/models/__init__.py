@@ -1,5 +1,7 @@
 # Keep this minimal and avoid importing models here to prevent circular imports.
 # Import db from extensions so `from app.models import db` continues to work.
+# User only depends on extensions, so `from app.models import User` (auth) is safe.
 from ..extensions import db
+from .user import User
 
-__all__ = ["db"]
+__all__ = ["db", "User"]
@@ -0,0 +1,28 @@
+from ..extensions import db
+
+# Cold storage for submitted entries of closed periods (see utils/archive.py). Same columns as
+# time_entry and the same ids: rows are moved, not copied, so ids stay unique across both tables.
+# Rows are read-only here; only the user/date and project/date access paths are indexed.
+class TimeEntryArchive(db.Model):
+    __tablename__ = "time_entry_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
+    work_date = db.Column(db.Date, nullable=False)
+    hours = db.Column(db.Float, default=0.0)
+    notes = db.Column(db.String(1000), default="")
+    is_submitted = db.Column(db.Boolean, default=True)
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    hourly_rate_applied = db.Column(db.Float, nullable=True)
+    burden_percent_applied = db.Column(db.Float, nullable=True)
+    labor_cost = db.Column(db.Float, nullable=True)
+    total_cost = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_time_entry_archive_user_date', 'user_id', 'work_date'),
+        db.Index('ix_time_entry_archive_project_date', 'project_id', 'work_date'),
+        db.Index('ix_time_entry_archive_work_date', 'work_date'),
+    )
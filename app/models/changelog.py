@@ -9,3 +9,8 @@ class ChangeLog(db.Model):
     changed_by = db.Column(db.Integer, nullable=True)  # user id
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     details = db.Column(db.Text, default="")
+
+    __table_args__ = (
+        db.Index('ix_change_log_record', 'table_name', 'record_id'),
+        db.Index('ix_change_log_action_timestamp', 'action', 'timestamp'),
+    )
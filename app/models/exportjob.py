@@ -0,0 +1,17 @@
+from datetime import datetime
+from ..extensions import db
+
+# Background export jobs (see utils/jobs.py). The rendered file lives under EXPORT_DIR.
+class ExportJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)  # queued, running, done, failed
+    params = db.Column(db.Text, default="{}")  # JSON
+    created_by = db.Column(db.Integer, nullable=True)  # user id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    file_path = db.Column(db.String(500), nullable=True)
+    download_name = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
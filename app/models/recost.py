@@ -0,0 +1,25 @@
+from datetime import datetime
+from ..extensions import db
+
+# Retroactive re-costing runs (see utils/recost.py). The cursor columns are the keyset checkpoint
+# (user_id, work_date, id) of the last entry processed, so an interrupted run resumes where it stopped.
+class RecostRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)  # None = every user
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    burden_percent = db.Column(db.Float, nullable=True)  # None = keep each entry's snapshot burden
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)  # pending, running, done, failed
+    cursor_user_id = db.Column(db.Integer, nullable=True)
+    cursor_work_date = db.Column(db.Date, nullable=True)
+    cursor_entry_id = db.Column(db.Integer, nullable=True)
+    total = db.Column(db.Integer, default=0)
+    processed = db.Column(db.Integer, default=0)
+    changed = db.Column(db.Integer, default=0)
+    labor_delta = db.Column(db.Float, default=0.0)
+    total_delta = db.Column(db.Float, default=0.0)
+    created_by = db.Column(db.Integer, nullable=True)  # user id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.Text, nullable=True)
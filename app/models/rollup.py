@@ -0,0 +1,23 @@
+from ..extensions import db
+
+# Pre-aggregated labor totals, maintained by utils/rollups.py.
+# Rows for a (user, day) are replaced as a unit, so a NULL project_id (company task) is fine here.
+class LaborRollupDaily(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
+    work_date = db.Column(db.Date, nullable=False, index=True)
+    hours = db.Column(db.Float, nullable=False, default=0.0)
+    labor_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    __table_args__ = (db.Index('ix_rollup_daily_user_date', 'user_id', 'work_date'),)
+
+class LaborRollupWeekly(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=True)
+    week_start = db.Column(db.Date, nullable=False, index=True)  # Monday of the ISO week
+    hours = db.Column(db.Float, nullable=False, default=0.0)
+    labor_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    __table_args__ = (db.Index('ix_rollup_weekly_user_week', 'user_id', 'week_start'),)
@@ -10,6 +10,12 @@ class GlobalSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     burden_percent = db.Column(db.Float, nullable=False, default=0.0)
 
+    # Bumped on every settings change so each worker's settings cache can tell it is stale
+    settings_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # Last day of the periods rolled over into time_entry_archive (None: nothing archived yet)
+    archived_through = db.Column(db.Date, nullable=True)
+
     def __repr__(self) -> str:
         return f"<GlobalSettings burden_percent={self.burden_percent}>"
 
@@ -16,5 +16,16 @@ class TimeEntry(db.Model):
     # Cost snapshot (set at submit time so wages/burden changes don't affect history)
     hourly_rate_applied = db.Column(db.Float, nullable=True)
     burden_percent_applied = db.Column(db.Float, nullable=True)
-    labor_cost = db.Column(db.Float, nullable=True)      # hours * hourly_rate_applied
+    labor_cost = db.Column(db.Float, nullable=True)      # paid hours (regular + OT*mult + DT*mult) * hourly_rate_applied
     total_cost = db.Column(db.Float, nullable=True)      # labor_cost * (1 + burden_percent_applied/100)
+
+    # Hot access paths: a user's days (timesheet grid, submit, autosave lookup by date + project)
+    # and a project's days (reports). Postgres also carries hours (daily totals) and updated_at
+    # (conditional GET fingerprints) in the leaf so those probes are index-only.
+    # AUTOINCREMENT keeps SQLite from reusing the ids of entries moved to time_entry_archive.
+    __table_args__ = (
+        db.Index('ix_time_entry_user_date_project', 'user_id', 'work_date', 'project_id',
+                 postgresql_include=['hours', 'updated_at']),
+        db.Index('ix_time_entry_project_date', 'project_id', 'work_date'),
+        {"sqlite_autoincrement": True},
+    )
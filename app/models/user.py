@@ -1,7 +1,21 @@
+from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-# class User(...):
-#   password_hash = db.Column(db.String(255))
+from ..extensions import db
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    email = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    password_hash = db.Column(db.String(255))
+    is_admin = db.Column(db.Boolean, default=False)
+    is_project_manager = db.Column(db.Boolean, default=False)
+    is_accounting = db.Column(db.Boolean, default=False)
+    is_archived = db.Column(db.Boolean, default=False)
+
+    time_entries = db.relationship("TimeEntry", backref="user", lazy="dynamic")
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
+
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -3,11 +3,20 @@ from flask_login import login_required
 from ..extensions import db
 from ..models.project import Project
 from ..models.timeentry import TimeEntry
+from ..models.archive import TimeEntryArchive
+from ..models.rollup import LaborRollupDaily, LaborRollupWeekly
 from ..utils.security import roles_required
 from ..utils.changes import log_change
 
 projects_bp = Blueprint('projects', __name__)
 
+def _has_entries(pid):
+    # Hot or archived entries, or rollup rows derived from them, all reference project.id
+    return db.session.query(db.or_(*(
+        db.exists().where(model.project_id == pid)
+        for model in (TimeEntry, TimeEntryArchive, LaborRollupDaily, LaborRollupWeekly)
+    ))).scalar()
+
 @projects_bp.route('/')
 @login_required
 @roles_required('admin')
@@ -61,7 +70,7 @@ def unarchive(pid):
 @roles_required('admin')
 def delete(pid):
     p = Project.query.get_or_404(pid)
-    if TimeEntry.query.filter_by(project_id=pid).first():
+    if _has_entries(pid):
         flash("Cannot delete project with time entries.", "danger")
         return redirect(url_for('projects.index'))
     db.session.delete(p)
@@ -1,27 +1,85 @@
-from datetime import datetime
-from flask import Blueprint, render_template, request, send_file
+from datetime import datetime, timedelta
+from flask import (Blueprint, Response, abort, current_app, g, jsonify, make_response, render_template,
+                   request, send_file, stream_with_context, url_for)
 from flask_login import login_required, current_user
+from sqlalchemy.orm import aliased
 from ..extensions import db
-from ..models.timeentry import TimeEntry
 from ..models.user import User
 from ..models.project import Project
-from ..utils.pdf import render_pdf_from_template
-from ..utils.costing import get_cost_for_entry
-import io, csv
+from ..models.timeentry import TimeEntry
+from ..models.rollup import LaborRollupDaily, LaborRollupWeekly
+from ..models.exportjob import ExportJob
+from ..models.wage import WageRate
+from ..models.assignments import PMProject
+from ..utils.pdf import render_pdf_chunked
+from ..utils.jobs import enqueue_job, job_handler
+from ..utils.costing import get_costs_for_entries, get_current_burden_percent, iter_costs
+from ..utils.overtime import get_overtime_rules
+from ..utils.export_cache import cache_get, cache_key, cache_put, stream_into_cache
+from ..utils.csv_utils import gzip_stream, stream_csv, stream_ndjson
+from ..utils.archive import entry_source
+from ..utils.conditional import not_modified, page_etag, with_validators
+from ..utils.engine_profiles import report_statement_timeout
+from ..utils.replica import read_replica, use_replica
+from ..utils.rollups import week_start
+import io
 
 reports_bp = Blueprint('reports', __name__)
 
-def _query_filtered(start, end, include_archived, user_id=None, project_id=None):
-    q = TimeEntry.query.join(User, TimeEntry.user_id==User.id).join(Project, isouter=True)
+# Rows fetched per round trip (and costed per batch) by the streaming exports
+EXPORT_CHUNK_ROWS = 1000
+
+# Rows per PDF chunk; larger reports are rendered as several chunks in parallel and merged
+PDF_CHUNK_ROWS = 500
+
+# Page sizes offered on the results view
+PAGE_SIZES = (50, 100, 250, 500)
+DEFAULT_PAGE_SIZE = 100
+
+def _query_filtered(start, end, include_archived, user_id=None, project_id=None, viewer=None):
+    # Entries come from the hot table alone unless the range reaches archived periods (see _entry)
+    E = entry_source(start, end)
+    q = (db.session.query(E).join(User, E.user_id==User.id)
+         .join(Project, E.project_id==Project.id, isouter=True))
     if user_id:
-        q = q.filter(TimeEntry.user_id==user_id)
+        q = q.filter(E.user_id==user_id)
     if project_id:
-        q = q.filter(TimeEntry.project_id==project_id)
-    q = q.filter(TimeEntry.work_date.between(start, end))
+        q = q.filter(E.project_id==project_id)
+    q = q.filter(E.work_date.between(start, end))
     if not include_archived:
-        q = q.filter((User.is_archived==False) & ((Project.is_archived==False) | (TimeEntry.project_id==None)))
+        q = q.filter((User.is_archived==False) & ((Project.is_archived==False) | (E.project_id==None)))
+    if viewer is not None:
+        q = _apply_visibility(q, E.project_id, viewer)
     return q
 
+def _entry(q):
+    """The entry entity a _query_filtered query selects: TimeEntry or its hot+cold union alias."""
+    return q.column_descriptions[0]["entity"]
+
+def _pm_scope(viewer):
+    """
+    Id of the PM whose assigned projects limit what `viewer` sees, or None for full visibility.
+    Memoized per request since every report query (and its cache key) asks.
+    """
+    cache = g.setdefault("_pm_scope", {})
+    if viewer.id not in cache:
+        restricted = viewer.is_project_manager and not viewer.is_admin and not viewer.is_accounting
+        cache[viewer.id] = viewer.id if restricted else None
+    return cache[viewer.id]
+
+def _apply_visibility(q, project_col, viewer):
+    """
+    Restricts a query to rows `viewer` may see: for PMs, their assigned projects plus company
+    tasks, as correlated EXISTS against PMProject (no id list is fetched or bound). A PM with
+    no assignments sees nothing.
+    """
+    pm_id = _pm_scope(viewer)
+    if pm_id is None:
+        return q
+    assigned = db.exists().where(PMProject.pm_user_id==pm_id, PMProject.project_id==project_col)
+    has_any = db.exists().where(PMProject.pm_user_id==pm_id)
+    return q.filter(assigned | ((project_col==None) & has_any))
+
 @reports_bp.route('/')
 @login_required
 def index():
@@ -34,130 +92,481 @@ def index():
 
 @reports_bp.route('/results')
 @login_required
+@read_replica
+@report_statement_timeout
 def results():
-    start = datetime.strptime(request.args.get('start'), "%Y-%m-%d").date()
-    end = datetime.strptime(request.args.get('end'), "%Y-%m-%d").date()
-    include_archived = request.args.get('include_archived') == '1'
-    user_id = request.args.get('user_id') or None
-    project_id = request.args.get('project_id') or None
+    params = _export_params()
+    q, scope = _scoped_query(params, current_user)
+    can_view_cost = current_user.is_admin or current_user.is_accounting
 
-    q = _query_filtered(start, end, include_archived, user_id, project_id)
+    # Unchanged data (and page) since the client's copy: 304 without running the page query
+    version = _data_version(q, can_view_cost)
+    etag = page_etag(_export_cache_key("results", params, scope, can_view_cost, q, version),
+                     request.args.get('per_page'), request.args.get('after'), request.args.get('before'))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
 
-    # PM restriction: only their projects (or company tasks)
-    if current_user.is_project_manager and not current_user.is_admin and not current_user.is_accounting:
-        pids = [r[0] for r in db.session.execute(db.text(
-            "SELECT project_id FROM p_m_project WHERE pm_user_id=:uid"), {"uid": current_user.id}).all()]
-        if pids:
-            q = q.filter((TimeEntry.project_id.in_(pids)) | (TimeEntry.project_id==None))
-        else:
-            q = q.filter(TimeEntry.id==None)
+    per_page = request.args.get('per_page', type=int)
+    if per_page not in PAGE_SIZES:
+        per_page = DEFAULT_PAGE_SIZE
+    after = _parse_cursor(request.args.get('after'))
+    before = _parse_cursor(request.args.get('before')) if after is None else None
 
-    entries = q.order_by(TimeEntry.work_date.asc()).all()
-    can_view_cost = current_user.is_admin or current_user.is_accounting
+    # Keyset pagination on (work_date, id): only the visible page is loaded and costed
+    page = _page_query(q, per_page, after, before).all()
+    more = len(page) > per_page
+    page = page[:per_page]
+    if before is not None:
+        page.reverse()
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = after is not None, more
 
-    rows = []
-    sum_hours = 0.0
-    sum_labor_cost = 0.0
-    sum_total_cost = 0.0
-    for e in entries:
-        cost = get_cost_for_entry(e)
-        rows.append((e, cost))
-        sum_hours += (e.hours or 0.0)
-        if can_view_cost:
-            sum_labor_cost += cost["labor_cost"]
-            sum_total_cost += cost["total_cost"]
+    args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+    args['per_page'] = per_page
+    prev_url = next_url = None
+    if page and has_prev:
+        prev_url = url_for('reports.results', before=_cursor(page[0]), **args)
+    if page and has_next:
+        next_url = url_for('reports.results', after=_cursor(page[-1]), **args)
 
-    return render_template('reports/results.html',
-                           rows=rows, start=start, end=end,
+    totals = _report_totals(q, can_view_cost)
+    return with_validators(make_response(render_template('reports/results.html',
+                           rows=list(zip(page, get_costs_for_entries(page))),
+                           start=params["start"], end=params["end"],
                            can_view_cost=can_view_cost,
-                           sum_hours=round(sum_hours, 2),
-                           sum_labor_cost=round(sum_labor_cost, 2),
-                           sum_total_cost=round(sum_total_cost, 2))
+                           per_page=per_page, page_sizes=PAGE_SIZES,
+                           prev_url=prev_url, next_url=next_url,
+                           first_url=url_for('reports.results', **args) if has_prev else None,
+                           row_count=totals["count"],
+                           sum_hours=totals["hours"],
+                           sum_labor_cost=totals["labor_cost"],
+                           sum_total_cost=totals["total_cost"])), etag)
+
+def _cursor(row):
+    return f"{row.work_date.isoformat()}_{row.id}"
+
+def _parse_cursor(value):
+    # "<work_date>_<id>" of the last (or first) row of the current page; invalid cursors restart
+    try:
+        d, i = (value or "").split("_")
+        return datetime.strptime(d, "%Y-%m-%d").date(), int(i)
+    except ValueError:
+        return None
+
+def _page_query(q, per_page, after=None, before=None):
+    """
+    One page of _report_rows(q) after (or, walking back, before) a (work_date, id) cursor, plus one
+    extra row that tells whether there is more. Rows come back in reverse order when paging back.
+    """
+    E = _entry(q)
+    rows = _report_rows(q)
+    if before is not None:
+        d, i = before
+        rows = (rows.filter((E.work_date < d) | ((E.work_date == d) & (E.id < i)))
+                .order_by(E.work_date.desc(), E.id.desc()))
+    else:
+        if after is not None:
+            d, i = after
+            rows = rows.filter((E.work_date > d) | ((E.work_date == d) & (E.id > i)))
+        rows = rows.order_by(E.work_date.asc(), E.id.asc())
+    return rows.limit(per_page + 1)
+
+def _report_rows(q):
+    # Plain column rows for listing entries; enough for get_costs_for_entries and the templates
+    E = _entry(q)
+    return q.with_entities(E.id, E.user_id, E.work_date, E.hours, E.is_submitted, E.hourly_rate_applied,
+                           E.burden_percent_applied, E.labor_cost, E.total_cost,
+                           User.username, Project.name.label('project_name'))
+
+def _snapshotted(E):
+    return ((E.hourly_rate_applied != None) & (E.burden_percent_applied != None) &
+            (E.labor_cost != None) & (E.total_cost != None))
+
+def _totals_query(q):
+    """Count, hours, snapshot labor/total cost and the number of entries without a snapshot."""
+    E = _entry(q)
+    snapshotted = _snapshotted(E)
+    return q.with_entities(
+        db.func.count(E.id),
+        db.func.coalesce(db.func.sum(E.hours), 0.0),
+        db.func.coalesce(db.func.sum(db.case((snapshotted, E.labor_cost), else_=0.0)), 0.0),
+        db.func.coalesce(db.func.sum(db.case((snapshotted, E.total_cost), else_=0.0)), 0.0),
+        db.func.coalesce(db.func.sum(db.case((snapshotted, 0), else_=1)), 0),
+    ).order_by(None)
+
+def _greatest(a, b):
+    return db.case((a > b, a), else_=b)
+
+def _least(a, b):
+    return db.case((a < b, a), else_=b)
+
+def _live_cost_query(q):
+    """
+    Labor and total cost of the entries in q without a cost snapshot, costed in SQL the way
+    get_costs_for_entries does it: the user's wage in effect on the day, the hours already logged
+    that day (lower ids) for the regular/OT/DT split, and the current burden and overtime rules.
+    """
+    E = _entry(q)
+    earlier = aliased(TimeEntry)
+    before = (db.select(db.func.coalesce(db.func.sum(db.func.coalesce(earlier.hours, 0.0)), 0.0))
+              .where(earlier.user_id == E.user_id, earlier.work_date == E.work_date, earlier.id < E.id)
+              .scalar_subquery())
+    rate = (db.select(WageRate.hourly_rate)
+            .where(WageRate.user_id == E.user_id, WageRate.effective_date <= E.work_date)
+            .order_by(WageRate.effective_date.desc())
+            .limit(1)
+            .scalar_subquery())
+    # OFFSET 0 keeps SQLite and Postgres from inlining the subqueries below into the expressions
+    # that use their columns several times, which would re-run the lookups for each use
+    pending = (q.filter(~_snapshotted(E))
+               .with_entities(db.func.coalesce(E.hours, 0.0).label("hours"), before.label("before"),
+                              db.func.coalesce(rate, 0.0).label("rate"))
+               .order_by(None)
+               .offset(0)
+               .subquery())
+
+    rules = get_overtime_rules()
+    before, after = pending.c.before, pending.c.before + pending.c.hours
+    regular = _greatest(_least(after, rules.ot_threshold) - before, 0.0)
+    overtime = _greatest(_least(after, rules.dt_threshold) - _greatest(before, rules.ot_threshold), 0.0)
+    doubletime = _greatest(after - _greatest(before, rules.dt_threshold), 0.0)
+    paid = regular + overtime * rules.ot_multiplier + doubletime * rules.dt_multiplier
+    labor = db.select((paid * pending.c.rate).label("labor")).offset(0).subquery().c.labor
+
+    def cents(value):
+        # round(value, 2) with Python's half-to-even rule, so the totals match the per-row costs
+        x = value * 100
+        whole = db.cast(x, db.BigInteger)  # truncates on SQLite, rounds on Postgres
+        whole = db.case((whole > x, whole - 1), else_=whole)
+        up = db.case((x - whole > 0.5, 1), (x - whole < 0.5, 0), else_=whole % 2)
+        return (whole + up) / 100.0
+    burden = get_current_burden_percent()
+    return db.session.query(
+        db.func.coalesce(db.func.sum(cents(labor)), 0.0),
+        db.func.coalesce(db.func.sum(cents(labor * (1.0 + burden / 100.0))), 0.0),
+    )
+
+def _report_totals(q, can_view_cost):
+    """
+    Row count and hour/cost totals for the whole filtered query. Submitted entries carry a cost
+    snapshot that is summed in SQL; entries without one (unsubmitted, normally just the open week)
+    are costed by a second aggregate query (see _live_cost_query) only when there are any.
+    """
+    count, hours, labor, total, live = _totals_query(q).one()
+    totals = {"count": count, "hours": round(float(hours), 2), "labor_cost": 0.0, "total_cost": 0.0}
+    if not can_view_cost:
+        return totals
+
+    labor, total = float(labor), float(total)
+    if live:
+        live_labor, live_total = _live_cost_query(q).one()
+        labor += float(live_labor)
+        total += float(live_total)
+    totals["labor_cost"] = round(labor, 2)
+    totals["total_cost"] = round(total, 2)
+    return totals
+
+# Streaming export formats: (cache extension, mimetype, download name)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv", "report.csv"),
+    "csv.gz": ("csv.gz", "application/gzip", "report.csv.gz"),
+    "ndjson": ("ndjson", "application/x-ndjson", "report.ndjson"),
+}
 
 @reports_bp.route('/export.csv')
 @login_required
+@read_replica
+@report_statement_timeout
 def export_csv():
+    return _stream_export("csv")
+
+@reports_bp.route('/export.csv.gz')
+@login_required
+@read_replica
+@report_statement_timeout
+def export_csv_gz():
+    return _stream_export("csv.gz")
+
+@reports_bp.route('/export.ndjson')
+@login_required
+@read_replica
+@report_statement_timeout
+def export_ndjson():
+    return _stream_export("ndjson")
+
+def _export_records(q, can_view_cost):
+    """
+    Typed export rows (dicts) for the filtered query, streamed off a server-side cursor and
+    costed one chunk at a time; nothing is held beyond one chunk.
+    """
+    E = _entry(q)
+    rows = (_report_rows(q)
+            .order_by(E.work_date.asc(), E.id.asc())
+            .yield_per(EXPORT_CHUNK_ROWS))
+    if not can_view_cost:
+        for r in rows:
+            yield {"id": r.id, "date": r.work_date.isoformat(), "employee": r.username,
+                   "project": r.project_name, "hours": round(float(r.hours or 0), 2),
+                   "submitted": bool(r.is_submitted)}
+        return
+    for r, c in iter_costs(rows, EXPORT_CHUNK_ROWS):
+        yield {"id": r.id, "date": r.work_date.isoformat(), "employee": r.username,
+               "project": r.project_name, "hours": round(float(r.hours or 0), 2),
+               "rate": round(c["rate"], 2), "burden_percent": round(c["burden_percent"], 2),
+               "labor_cost": round(c["labor_cost"], 2), "total_cost": round(c["total_cost"], 2),
+               "submitted": bool(r.is_submitted)}
+
+def _csv_body(records, can_view_cost):
+    if can_view_cost:
+        header = ["Date","Employee","Project","Hours","Rate","Burden %","Labor Cost","Total Cost","Submitted"]
+        body = ([r["date"], r["employee"], r["project"] or "Company Task", f"{r['hours']:.2f}",
+                 f"{r['rate']:.2f}", f"{r['burden_percent']:.2f}", f"{r['labor_cost']:.2f}",
+                 f"{r['total_cost']:.2f}", "Yes" if r["submitted"] else "No"]
+                for r in records)
+    else:
+        header = ["Date","Employee","Project","Hours","Submitted"]
+        body = ([r["date"], r["employee"], r["project"] or "Company Task", f"{r['hours']:.2f}",
+                 "Yes" if r["submitted"] else "No"]
+                for r in records)
+    return stream_csv(header, body)
+
+def _stream_export(fmt):
+    ext, mimetype, filename = EXPORT_FORMATS[fmt]
+    params = _export_params()
+    q, scope = _scoped_query(params, current_user)
+    can_view_cost = current_user.is_admin or current_user.is_accounting
+
+    version = _data_version(q, can_view_cost)
+    key = _export_cache_key(ext, params, scope, can_view_cost, q, version)
+    unchanged = not_modified(key)
+    if unchanged:
+        return unchanged
+    cached = cache_get(key, ext)
+    if cached:
+        return with_validators(send_file(cached, mimetype=mimetype, as_attachment=True,
+                                         download_name=filename), key)
+
+    records = _export_records(q, can_view_cost)
+    if fmt == "ndjson":
+        chunks = stream_ndjson(records)
+    else:
+        chunks = _csv_body(records, can_view_cost)
+        if fmt == "csv.gz":
+            # A .csv.gz file download, not Content-Encoding: clients keep the compressed file as is
+            chunks = gzip_stream(chunks, current_app.config.get("EXPORT_GZIP_LEVEL", 6))
+
+    # Streamed to the client and into the export cache at the same time
+    chunks = stream_into_cache(key, ext, chunks)
+    return with_validators(Response(stream_with_context(chunks), mimetype=mimetype,
+                                    headers={"Content-Disposition": f"attachment; filename={filename}"}),
+                           key)
+
+def _export_params():
+    # Report filters from the query string, normalized so equal requests compare (and hash) equal
     start = datetime.strptime(request.args.get('start'), "%Y-%m-%d").date()
     end = datetime.strptime(request.args.get('end'), "%Y-%m-%d").date()
-    include_archived = request.args.get('include_archived') == '1'
     user_id = request.args.get('user_id') or None
     project_id = request.args.get('project_id') or None
-    q = _query_filtered(start, end, include_archived, user_id, project_id)
-
-    # PM restriction
-    if current_user.is_project_manager and not current_user.is_admin and not current_user.is_accounting:
-        pids = [r[0] for r in db.session.execute(db.text(
-            "SELECT project_id FROM p_m_project WHERE pm_user_id=:uid"), {"uid": current_user.id}).all()]
-        if pids:
-            q = q.filter((TimeEntry.project_id.in_(pids)) | (TimeEntry.project_id==None))
-        else:
-            q = q.filter(TimeEntry.id==None)
-
-    entries = q.order_by(TimeEntry.work_date.asc()).all()
-    can_view_cost = current_user.is_admin or current_user.is_accounting
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "include_archived": request.args.get('include_archived') == '1',
+        "user_id": int(user_id) if user_id else None,
+        "project_id": int(project_id) if project_id else None,
+    }
 
-    output = io.StringIO()
-    w = csv.writer(output)
+def _scoped_query(params, viewer):
+    """Filtered entry query as `viewer` may see it, plus a description of that visibility scope."""
+    start = datetime.strptime(params["start"], "%Y-%m-%d").date()
+    end = datetime.strptime(params["end"], "%Y-%m-%d").date()
+    q = _query_filtered(start, end, params["include_archived"], params["user_id"], params["project_id"],
+                        viewer=viewer)
+    scope = ["all"]
+    pm_id = _pm_scope(viewer)
+    if pm_id is not None:
+        # Assignment fingerprint so cached exports follow changes to the PM's projects
+        assigned = (db.session.query(db.func.count(PMProject.id), db.func.sum(PMProject.project_id),
+                                     db.func.max(PMProject.id))
+                    .filter(PMProject.pm_user_id==pm_id).one())
+        scope = ["pm", pm_id, list(assigned)]
+    return q, scope
+
+def _version_query(q):
+    E = _entry(q)
+    return q.with_entities(db.func.max(E.updated_at), db.func.count(E.id)).order_by(None)
+
+def _data_version(q, can_view_cost):
+    """
+    Fingerprint of the rows a report covers: latest update + count, so edits and deletes both change
+    it, and for live-costed rows the wage table and burden/overtime settings.
+    """
+    updated, count = _version_query(q).one()
+    costing = None
     if can_view_cost:
-        w.writerow(["Date","Employee","Project","Hours","Rate","Burden %","Labor Cost","Total Cost","Submitted"])
-    else:
-        w.writerow(["Date","Employee","Project","Hours","Submitted"])
-    for e in entries:
-        proj = (e.project.name if e.project else "Company Task")
+        wages = db.session.query(db.func.count(WageRate.id), db.func.max(WageRate.id),
+                                 db.func.sum(WageRate.hourly_rate)).one()
+        costing = [list(wages), get_current_burden_percent(), list(get_overtime_rules())]
+    return [updated, count, costing]
+
+def _export_cache_key(kind, params, scope, can_view_cost, q, version=None):
+    """Export cache key: filters, scope and the data version (see _data_version)."""
+    if version is None:
+        version = _data_version(q, can_view_cost)
+    return cache_key(kind, params, scope, can_view_cost, version)
+
+def _report_pdf_version(params, viewer):
+    """(query, cache key, can_view_cost) of the report PDF for these filters and viewer."""
+    q, scope = _scoped_query(params, viewer)
+    can_view_cost = viewer.is_admin or viewer.is_accounting
+    return q, _export_cache_key("pdf", params, scope, can_view_cost, q), can_view_cost
+
+def _report_pdf(params, viewer, version=None):
+    """
+    The PDF for these filters and viewer as a readable binary file object: the cached copy, or a
+    freshly rendered one (which is also cached) on a miss. The caller closes it.
+    """
+    q, key, can_view_cost = version or _report_pdf_version(params, viewer)
+    cached = cache_get(key, "pdf")
+    if cached:
+        return cached
+    pdf = _render_report_pdf(params, q, can_view_cost)
+    cache_put(key, "pdf", pdf)
+    return io.BytesIO(pdf)
+
+def _render_report_pdf(params, q, can_view_cost):
+    start = datetime.strptime(params["start"], "%Y-%m-%d").date()
+    end = datetime.strptime(params["end"], "%Y-%m-%d").date()
+    entries = q.order_by(_entry(q).work_date.asc()).all()
+    rows = list(zip(entries, get_costs_for_entries(entries)))
+    sum_hours = 0.0
+    sum_labor_cost = 0.0
+    sum_total_cost = 0.0
+    for e, c in rows:
+        sum_hours += (e.hours or 0.0)
         if can_view_cost:
-            c = get_cost_for_entry(e)
-            w.writerow([e.work_date.isoformat(), e.user.username, proj,
-                        f"{e.hours:.2f}", f"{c['rate']:.2f}", f"{c['burden_percent']:.2f}",
-                        f"{c['labor_cost']:.2f}", f"{c['total_cost']:.2f}",
-                        "Yes" if e.is_submitted else "No"])
-        else:
-            w.writerow([e.work_date.isoformat(), e.user.username, proj,
-                        f"{e.hours:.2f}", "Yes" if e.is_submitted else "No"])
-
-    mem = io.BytesIO(output.getvalue().encode('utf-8'))
-    mem.seek(0)
-    return send_file(mem, mimetype='text/csv', as_attachment=True, download_name='report.csv')
+            sum_labor_cost += c["labor_cost"]
+            sum_total_cost += c["total_cost"]
+
+    return render_pdf_chunked('reports/pdf.html', rows, chunk_rows=PDF_CHUNK_ROWS,
+                              start=start, end=end,
+                              can_view_cost=can_view_cost,
+                              sum_hours=round(sum_hours, 2),
+                              sum_labor_cost=round(sum_labor_cost, 2),
+                              sum_total_cost=round(sum_total_cost, 2))
+
+@job_handler("report_pdf")
+def _report_pdf_job(job, params):
+    with use_replica():
+        viewer = db.session.get(User, job.created_by)
+        pdf = _report_pdf(params, viewer)
+    with pdf:
+        return pdf.read(), 'report.pdf', 'application/pdf'
 
 @reports_bp.route('/export.pdf')
 @login_required
+@read_replica
+@report_statement_timeout
 def export_pdf():
+    params = _export_params()
+    version = _report_pdf_version(params, current_user)
+    _, key, _ = version
+    unchanged = not_modified(key)
+    if unchanged:
+        return unchanged
+    return with_validators(send_file(_report_pdf(params, current_user, version), mimetype='application/pdf',
+                                     as_attachment=True, download_name='report.pdf'), key)
+
+@reports_bp.post('/export.pdf')
+@login_required
+def queue_pdf():
+    # Queues the render and returns a job id instead of tying up this worker
+    job = enqueue_job("report_pdf", _export_params(), current_user.id)
+    return jsonify({"job_id": job.id, "status": job.status,
+                    "status_url": url_for('reports.job_status', job_id=job.id),
+                    "download_url": url_for('reports.job_download', job_id=job.id)}), 202
+
+def _own_job_or_404(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if job is None or (job.created_by != current_user.id and not current_user.is_admin):
+        abort(404)
+    return job
+
+@reports_bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = _own_job_or_404(job_id)
+    return jsonify({"job_id": job.id, "status": job.status, "error": job.error,
+                    "download_url": url_for('reports.job_download', job_id=job.id) if job.status == "done" else None})
+
+@reports_bp.route('/jobs/<job_id>/download')
+@login_required
+def job_download(job_id):
+    job = _own_job_or_404(job_id)
+    if job.status != "done":
+        return jsonify({"job_id": job.id, "status": job.status}), 409
+    return send_file(job.file_path, mimetype=job.mimetype, as_attachment=True, download_name=job.download_name)
+
+def _rollup_query(model, include_archived, user_id=None, project_id=None):
+    q = (db.session.query(model.user_id, model.project_id,
+                          db.func.sum(model.hours), db.func.sum(model.labor_cost), db.func.sum(model.total_cost))
+         .join(User, model.user_id==User.id)
+         .outerjoin(Project, model.project_id==Project.id))
+    if user_id:
+        q = q.filter(model.user_id==user_id)
+    if project_id:
+        q = q.filter(model.project_id==project_id)
+    if not include_archived:
+        q = q.filter((User.is_archived==False) & ((Project.is_archived==False) | (model.project_id==None)))
+    q = _apply_visibility(q, model.project_id, current_user)
+    return q.group_by(model.user_id, model.project_id)
+
+@reports_bp.route('/summary')
+@login_required
+@read_replica
+@report_statement_timeout
+def summary():
+    """Hours and cost per employee/project, read from the rollup tables instead of raw entries."""
     start = datetime.strptime(request.args.get('start'), "%Y-%m-%d").date()
     end = datetime.strptime(request.args.get('end'), "%Y-%m-%d").date()
     include_archived = request.args.get('include_archived') == '1'
     user_id = request.args.get('user_id') or None
     project_id = request.args.get('project_id') or None
-    q = _query_filtered(start, end, include_archived, user_id, project_id)
-
-    # PM restriction
-    if current_user.is_project_manager and not current_user.is_admin and not current_user.is_accounting:
-        pids = [r[0] for r in db.session.execute(db.text(
-            "SELECT project_id FROM p_m_project WHERE pm_user_id=:uid"), {"uid": current_user.id}).all()]
-        if pids:
-            q = q.filter((TimeEntry.project_id.in_(pids)) | (TimeEntry.project_id==None))
-        else:
-            q = q.filter(TimeEntry.id==None)
-
-    entries = q.order_by(TimeEntry.work_date.asc()).all()
-    can_view_cost = current_user.is_admin or current_user.is_accounting
 
-    rows = []
-    sum_hours = 0.0
-    sum_labor_cost = 0.0
-    sum_total_cost = 0.0
-    for e in entries:
-        c = get_cost_for_entry(e)
-        rows.append((e, c))
-        sum_hours += (e.hours or 0.0)
-        if can_view_cost:
-            sum_labor_cost += c["labor_cost"]
-            sum_total_cost += c["total_cost"]
+    # Whole ISO weeks come from the weekly rollup; the ragged edges from the daily one
+    first_week = week_start(start) if start.weekday() == 0 else week_start(start) + timedelta(days=7)
+    last_week = week_start(end) if end.weekday() == 6 else week_start(end) - timedelta(days=7)
+    parts = []
+    if first_week <= last_week:
+        parts.append(_rollup_query(LaborRollupWeekly, include_archived, user_id, project_id)
+                     .filter(LaborRollupWeekly.week_start.between(first_week, last_week)))
+        daily_ranges = [(start, first_week - timedelta(days=1)), (last_week + timedelta(days=7), end)]
+    else:
+        daily_ranges = [(start, end)]
+    for lo, hi in daily_ranges:
+        if lo <= hi:
+            parts.append(_rollup_query(LaborRollupDaily, include_archived, user_id, project_id)
+                         .filter(LaborRollupDaily.work_date.between(lo, hi)))
+
+    totals = {}
+    for part in parts:
+        for uid, pid, h, l, t in part.all():
+            acc = totals.setdefault((uid, pid), [0.0, 0.0, 0.0])
+            acc[0] += h or 0.0
+            acc[1] += l or 0.0
+            acc[2] += t or 0.0
 
-    pdf = render_pdf_from_template('reports/pdf.html',
-                                   rows=rows, start=start, end=end,
-                                   can_view_cost=can_view_cost,
-                                   sum_hours=round(sum_hours, 2),
-                                   sum_labor_cost=round(sum_labor_cost, 2),
-                                   sum_total_cost=round(sum_total_cost, 2))
-    mem = io.BytesIO(pdf)
-    mem.seek(0)
-    return send_file(mem, mimetype='application/pdf', as_attachment=True, download_name='report.pdf')
+    users = {u.id: u.username for u in User.query.filter(User.id.in_({k[0] for k in totals}))} if totals else {}
+    projects = ({p.id: p.name for p in Project.query.filter(Project.id.in_({k[1] for k in totals if k[1]}))}
+                if totals else {})
+    rows = sorted(((users.get(uid, ""), projects.get(pid, "Company Task"), h, l, t)
+                   for (uid, pid), (h, l, t) in totals.items()),
+                  key=lambda r: (r[0], r[1]))
+    can_view_cost = current_user.is_admin or current_user.is_accounting
+    return render_template('reports/summary.html',
+                           rows=rows, start=start, end=end,
+                           can_view_cost=can_view_cost,
+                           sum_hours=round(sum(r[2] for r in rows), 2),
+                           sum_labor_cost=round(sum(r[3] for r in rows), 2),
+                           sum_total_cost=round(sum(r[4] for r in rows), 2))
@@ -1,69 +1,208 @@
 from datetime import date, datetime, timedelta
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, current_app
+from types import SimpleNamespace
+from flask import (Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify, send_file,
+                   current_app, make_response, stream_with_context)
 from flask_login import login_required, current_user
 from ..extensions import db
 from ..models.timeentry import TimeEntry
 from ..models.project import Project
-from ..utils.csv_utils import parse_patrot_csv
+from ..utils.archive import entry_source, is_closed
+from ..utils.csv_utils import parse_patriot_totals, stream_csv
+from ..utils.conditional import not_modified, page_etag, with_validators
+from ..utils.export_cache import cache_key
 from ..utils.pdf import render_pdf_from_template
 from ..utils.changes import log_change
-from ..utils.costing import assign_snapshot_cost
-import io, csv
+from ..utils.costing import get_current_burden_percent, load_wage_timelines, snapshot_params
+from ..utils.overtime import entry_buckets, get_overtime_rules
+from ..utils.reconcile import reconcile_patriot
+from ..utils.rollups import refresh_rollups
+import io
 
 timesheets_bp = Blueprint('timesheets', __name__)
 
+# Longest range the timesheet grid will render
+MAX_RANGE_DAYS = 366
+
+def _parse_day(value, default):
+    # A missing or malformed date falls back to the default rather than failing the request
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else default
+    except ValueError:
+        return default
+
+def _date_range():
+    # ?start=&end= (YYYY-MM-DD); defaults to the last 14 days
+    start = _parse_day(request.args.get('start'), date.today() - timedelta(days=13))
+    end = _parse_day(request.args.get('end'), date.today())
+    return start, end
+
+def _virtual_entry(d):
+    # Placeholder row for a day with no entries; saved for real on its first non-empty autosave
+    return SimpleNamespace(id=None, work_date=d, project_id=None, project=None, hours=0.0, notes="",
+                           is_submitted=False)
+
+def _day_rows(entries, start, end):
+    """Entries in date order, with a virtual row for every day in [start, end] that has none."""
+    by_date = {}
+    for e in entries:
+        by_date.setdefault(e.work_date, []).append(e)
+    rows = []
+    for i in range((end - start).days + 1):
+        d = start + timedelta(days=i)
+        rows.extend(by_date.get(d) or [_virtual_entry(d)])
+    return rows
+
 @timesheets_bp.route('/')
 @login_required
 def index():
-    # Show last 14 days by default
-    end = date.today()
-    start = end - timedelta(days=13)
-
-    # Ensure there is a stub entry for each day in the range (so the UI can edit/autosave)
-    existing = (TimeEntry.query
-                .filter(TimeEntry.user_id == current_user.id,
-                        TimeEntry.work_date.between(start, end))
-                .all())
-    existing_by_date = {e.work_date for e in existing}
-    for i in range((end - start).days + 1):
-        d = start + timedelta(days=i)
-        if d not in existing_by_date:
-            db.session.add(TimeEntry(user_id=current_user.id, work_date=d, hours=0.0, notes=""))
-    if len(existing_by_date) != (end - start).days + 1:
-        db.session.commit()
+    # Read-only: missing days are rendered as virtual rows instead of stub entries
+    start, end = _date_range()
+    if end < start:
+        start, end = end, start
+    if (end - start).days >= MAX_RANGE_DAYS:
+        flash(f"Showing the last {MAX_RANGE_DAYS} days of the requested range.", "warning")
+        start = end - timedelta(days=MAX_RANGE_DAYS - 1)
 
-    entries = (TimeEntry.query
-               .filter(TimeEntry.user_id == current_user.id,
-                       TimeEntry.work_date.between(start, end))
-               .order_by(TimeEntry.work_date.asc())
-               .all())
+    # The project picker is part of the page, so its (small) list is part of the fingerprint
     projects = Project.query.filter_by(is_archived=False).order_by(Project.name.asc()).all()
-    return render_template('timesheets/index.html', entries=entries, projects=projects, start=start, end=end)
+    version = _range_version(start, end)
+    etag = page_etag("timesheet", start, end, version, [(p.id, p.name) for p in projects])
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+
+    entries = _user_entries(current_user.id, start, end).all()
+    page = render_template('timesheets/index.html', entries=_day_rows(entries, start, end), projects=projects,
+                           start=start, end=end)
+    return with_validators(make_response(page), etag)
+
+def _user_entries(user_id, start, end):
+    # A user's entries in [start, end] in grid order, archived days included
+    E = entry_source(start, end)
+    return (db.session.query(E)
+            .filter(E.user_id == user_id, E.work_date.between(start, end))
+            .order_by(E.work_date.asc(), E.id.asc()))
+
+def _range_version(start, end):
+    """[latest updated_at, count] of the current user's entries in [start, end], for their ETags."""
+    q = _user_entries(current_user.id, start, end)
+    E = q.column_descriptions[0]["entity"]
+    updated, count = q.with_entities(db.func.max(E.updated_at), db.func.count(E.id)).order_by(None).one()
+    return [updated, count]
+
+# Upper bound on rows accepted by one /save-batch request
+MAX_BATCH_ROWS = 500
+
+def _parse_row(raw):
+    entry_id = raw.get('entry_id') or None
+    project_id = raw.get('project_id') or None
+    return {
+        "entry_id": int(entry_id) if entry_id is not None else None,
+        "work_date": datetime.strptime(raw.get('work_date'), "%Y-%m-%d").date(),
+        "project_id": int(project_id) if project_id is not None else None,
+        "hours": float(raw.get('hours') or 0),
+        "notes": raw.get('notes') or '',
+    }
+
+def _prefetch_query(user_id, dates):
+    # Every entry of the user's given (open) days, oldest first
+    return (TimeEntry.query
+            .filter(TimeEntry.user_id == user_id, TimeEntry.work_date.in_(dates))
+            .order_by(TimeEntry.id.asc()))
+
+def _apply_rows(raw_rows):
+    """
+    Applies autosave rows for the current user in one transaction and returns per-row results.
+    A row with entry_id updates that entry (including a project change); otherwise the entry is
+    found (or created) by date + project, company task when project_id is empty.
+    """
+    results = [None] * len(raw_rows)
+    parsed = []
+    for i, raw in enumerate(raw_rows):
+        try:
+            row = _parse_row(raw)
+        except (AttributeError, TypeError, ValueError):
+            results[i] = {"index": i, "ok": False, "message": "Invalid row."}
+            continue
+        if is_closed(row["work_date"]):
+            # Archived periods are read-only
+            results[i] = {"index": i, "ok": False, "message": "Period is closed."}
+            continue
+        parsed.append((i, row))
+
+    # One prefetch for every day touched by the batch
+    dates = {row["work_date"] for _, row in parsed}
+    existing = _prefetch_query(current_user.id, dates).all() if dates else []
+    by_id = {e.id: e for e in existing}
+    by_key = {}
+    for e in existing:
+        by_key.setdefault((e.work_date, e.project_id), e)
+
+    saved = []
+    for i, row in parsed:
+        key = (row["work_date"], row["project_id"])
+        if row["entry_id"] is not None:
+            entry = by_id.get(row["entry_id"])
+            if entry is None or entry.work_date != row["work_date"]:
+                results[i] = {"index": i, "ok": False, "message": "Entry not found."}
+                continue
+        else:
+            entry = by_key.get(key)
+            if entry is None and not row["hours"] and not row["notes"]:
+                # Clearing a virtual row: nothing to store
+                results[i] = {"index": i, "ok": True, "id": None}
+                continue
+            if entry is None:
+                entry = TimeEntry(user_id=current_user.id, work_date=row["work_date"], project_id=row["project_id"])
+                db.session.add(entry)
+                by_key[key] = entry
+        if entry.is_submitted:
+            results[i] = {"index": i, "ok": False, "message": "Entry is locked."}
+            continue
+
+        if entry.project_id != row["project_id"]:
+            # Keep later rows of the batch resolving date + project to the right entry
+            old_key = (entry.work_date, entry.project_id)
+            if by_key.get(old_key) is entry:
+                del by_key[old_key]
+            by_key.setdefault(key, entry)
+        entry.project_id = row["project_id"]
+        entry.hours = row["hours"]
+        entry.notes = row["notes"]
+        saved.append((i, entry, row))
+
+    if saved:
+        # refresh_rollups flushes first, so new entries have their ids for the audit rows
+        refresh_rollups(current_user.id, {e.work_date for _, e, _ in saved})
+        for _, entry, row in saved:
+            log_change("timeentry", entry.id, "autosave", {"date": row["work_date"].isoformat(), "hours": row["hours"]})
+        db.session.commit()
+    for i, entry, _ in saved:
+        results[i] = {"index": i, "ok": True, "id": entry.id}
+    return results
 
 @timesheets_bp.route('/save', methods=['POST'])
 @login_required
 def save():
     # Autosave endpoint for a single row
-    work_date = request.form.get('work_date')
-    project_id = request.form.get('project_id') or None
-    hours = float(request.form.get('hours') or 0)
-    notes = request.form.get('notes','')
-    d = datetime.strptime(work_date, "%Y-%m-%d").date()
-
-    # Find (or create) the entry for this date + project (company task when project_id is None)
-    entry = TimeEntry.query.filter_by(user_id=current_user.id, work_date=d, project_id=project_id).first()
-    if not entry:
-        entry = TimeEntry(user_id=current_user.id, work_date=d, project_id=project_id)
-        db.session.add(entry)
-    if entry.is_submitted:
-        return jsonify({"ok": False, "message": "Entry is locked."}), 400
-
-    entry.hours = hours
-    entry.notes = notes
-    log_change("timeentry", entry.id or "new", "autosave", {"date": work_date, "hours": hours})
-    db.session.commit()
+    result = _apply_rows([request.form])[0]
+    if not result["ok"]:
+        return jsonify({"ok": False, "message": result["message"]}), 400
     return jsonify({"ok": True})
 
+@timesheets_bp.route('/save-batch', methods=['POST'])
+@login_required
+def save_batch():
+    # Autosave endpoint for many rows: {"rows": [{entry_id?, work_date, project_id, hours, notes}, ...]}
+    payload = request.get_json(silent=True) or {}
+    rows = payload.get('rows')
+    if not isinstance(rows, list):
+        return jsonify({"ok": False, "message": "Expected a list of rows."}), 400
+    if len(rows) > MAX_BATCH_ROWS:
+        return jsonify({"ok": False, "message": f"At most {MAX_BATCH_ROWS} rows per request."}), 400
+    results = _apply_rows(rows)
+    return jsonify({"ok": all(r["ok"] for r in results), "results": results})
+
 @timesheets_bp.route('/import', methods=['GET','POST'])
 @login_required
 def import_csv():
@@ -72,14 +211,30 @@ def import_csv():
         if not f:
             flash("No file uploaded.", "danger")
             return redirect(url_for('timesheets.import_csv'))
-        totals = parse_patrot_csv(f)
-        return render_template('timesheets/import_result.html', totals=totals)
+        skipped = {}
+        totals = parse_patriot_totals(f, skipped)
+        tol_hours = float(current_app.config.get("DAILY_TOLERANCE_MINUTES", 6))/60.0
+        # Admin/accounting reconcile the whole company export; everyone else only their own rows
+        company = current_user.is_admin or current_user.is_accounting
+        result = reconcile_patriot(totals, tol_hours, only_user_id=None if company else current_user.id,
+                                   default_user=current_user)
+        own = sorted((d, h) for (uid, d), h in result["patriot"].items() if uid == current_user.id)
+        return render_template('timesheets/import_result.html', result=result, own=own, company=company,
+                               skipped=skipped.get("rows", 0), tol_hours=tol_hours)
     return render_template('timesheets/import.html')
 
-def _daily_total_for_user(d):
-    q = db.session.query(db.func.coalesce(db.func.sum(TimeEntry.hours), 0.0)).filter(
-        TimeEntry.user_id==current_user.id, TimeEntry.work_date==d)
-    return float(q.scalar() or 0.0)
+def _daily_totals_for_user(dates):
+    # {work_date: hours} for the current user's given days, in one GROUP BY; days with no entries are absent.
+    # Closed days are read from the archive too.
+    if not dates:
+        return {}
+    return {d: float(h or 0.0) for d, h in _daily_totals_query(current_user.id, dates)}
+
+def _daily_totals_query(user_id, dates):
+    E = entry_source(min(dates), max(dates))
+    return (db.session.query(E.work_date, db.func.coalesce(db.func.sum(E.hours), 0.0))
+            .filter(E.user_id==user_id, E.work_date.in_(dates))
+            .group_by(E.work_date))
 
 @timesheets_bp.route('/submit', methods=['POST'])
 @login_required
@@ -101,66 +256,92 @@ def submit():
     tol_minutes = float(current_app.config.get("DAILY_TOLERANCE_MINUTES", 6))
     tol_hours = tol_minutes/60.0
 
-    # Validate each day if provided
-    for n in range((end-start).days+1):
-        d = start + timedelta(days=n)
-        if d in patriot:
-            tot = _daily_total_for_user(d)
-            if abs(tot - patriot[d]) > tol_hours:
-                flash(f"Day {d} mismatch: Patriot {patriot[d]:.2f}h vs Entered {tot:.2f}h (tolerance {tol_hours:.2f}h). Fix before submitting.", "danger")
-                return redirect(url_for('timesheets.index'))
+    # Validate the provided days against one GROUP BY of the entered totals
+    days = sorted(d for d in patriot if start <= d <= end)
+    totals = _daily_totals_for_user(days)
+    for d in days:
+        tot = totals.get(d, 0.0)
+        if abs(tot - patriot[d]) > tol_hours:
+            flash(f"Day {d} mismatch: Patriot {patriot[d]:.2f}h vs Entered {tot:.2f}h (tolerance {tol_hours:.2f}h). Fix before submitting.", "danger")
+            return redirect(url_for('timesheets.index', start=start, end=end))
 
-    # Snapshot cost & lock
+    # Snapshot cost & lock. Wages, burden and the regular/OT/DT split for the whole range are resolved
+    # up front and the snapshots are written by one executemany UPDATE instead of per-entry ORM flushes.
+    unsubmitted = (TimeEntry.is_submitted==False) | (TimeEntry.is_submitted==None)
+    rows = (db.session.query(TimeEntry.id, TimeEntry.user_id, TimeEntry.work_date, TimeEntry.hours)
+            .filter(TimeEntry.user_id==current_user.id, TimeEntry.work_date.between(start, end), unsubmitted)
+            .all())
     changed = 0
-    entries = (TimeEntry.query
-               .filter(TimeEntry.user_id==current_user.id, TimeEntry.work_date.between(start, end))
-               .all())
-    for e in entries:
-        if not e.is_submitted:
-            assign_snapshot_cost(e)  # persist cost snapshot on the entry
-            e.is_submitted = True
-            e.submitted_at = datetime.utcnow()
-            changed += 1
-            log_change("timeentry", e.id, "submitted", {"date": str(e.work_date), "hours": e.hours,
-                                                        "rate": e.hourly_rate_applied,
-                                                        "burden": e.burden_percent_applied,
-                                                        "total_cost": e.total_cost})
+    if rows:
+        rules = get_overtime_rules()
+        buckets = entry_buckets([current_user.id], start, end, rules)
+        timelines = load_wage_timelines([current_user.id], until=end)
+        params = snapshot_params(rows, timelines, get_current_burden_percent(), buckets, rules)
+        now = datetime.utcnow()
+        for p in params:
+            p["is_submitted"] = True
+            p["submitted_at"] = now
+        t = TimeEntry.__table__
+        # The is_submitted guard keeps a concurrent submit of the same range from snapshotting twice
+        db.session.execute(
+            t.update().where(t.c.id == db.bindparam("entry_id"), (t.c.is_submitted == False) | (t.c.is_submitted == None)),
+            params)
+        # Only the rows this request stamped count; any others were taken by a concurrent submit
+        mine = {i for (i,) in db.session.query(TimeEntry.id)
+                .filter(TimeEntry.id.in_([r.id for r in rows]), TimeEntry.submitted_at == now)}
+        changed = len(mine)
+        for r, p in zip(rows, params):
+            if r.id not in mine:
+                continue
+            log_change("timeentry", r.id, "submitted", {"date": str(r.work_date), "hours": r.hours,
+                                                        "rate": p["hourly_rate_applied"],
+                                                        "burden": p["burden_percent_applied"],
+                                                        "total_cost": p["total_cost"]})
+        # Snapshot costs replace the live estimate in the rollups
+        if mine:
+            refresh_rollups(current_user.id, {r.work_date for r in rows if r.id in mine})
     db.session.commit()
     flash(f"Submitted {changed} entries.", "success")
-    return redirect(url_for('timesheets.index'))
+    return redirect(url_for('timesheets.index', start=start, end=end))
 
 @timesheets_bp.route('/export.csv')
 @login_required
 def export_csv():
     # Export user's entries in range
-    start = request.args.get('start')
-    end = request.args.get('end')
-    start = datetime.strptime(start, "%Y-%m-%d").date() if start else (date.today() - timedelta(days=13))
-    end = datetime.strptime(end, "%Y-%m-%d").date() if end else date.today()
-
-    entries = (TimeEntry.query
-               .filter(TimeEntry.user_id==current_user.id, TimeEntry.work_date.between(start, end))
-               .order_by(TimeEntry.work_date.asc())
-               .all())
-    output = io.StringIO()
-    w = csv.writer(output)
-    w.writerow(["Date","Project","Hours","Notes","Submitted"])
-    for e in entries:
-        w.writerow([e.work_date.isoformat(), (e.project.name if e.project else "Company Task"), f"{e.hours:.2f}", e.notes, "Yes" if e.is_submitted else "No"])
-    mem = io.BytesIO(output.getvalue().encode('utf-8'))
-    mem.seek(0)
-    return send_file(mem, mimetype='text/csv', as_attachment=True, download_name='my_time.csv')
+    start, end = _date_range()
+    version = _range_version(start, end)
+    etag = cache_key("timesheet.csv", current_user.id, start, end, version)
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+
+    E = entry_source(start, end)
+    rows = (db.session.query(E.work_date, E.hours, E.notes, E.is_submitted, Project.name.label('project_name'))
+            .outerjoin(Project, E.project_id==Project.id)
+            .filter(E.user_id==current_user.id, E.work_date.between(start, end))
+            .order_by(E.work_date.asc(), E.id.asc())
+            .yield_per(1000))
+    body = ([r.work_date.isoformat(), r.project_name or "Company Task", f"{r.hours or 0:.2f}", r.notes,
+             "Yes" if r.is_submitted else "No"] for r in rows)
+    return with_validators(Response(stream_with_context(stream_csv(["Date","Project","Hours","Notes","Submitted"], body)),
+                                    mimetype='text/csv',
+                                    headers={"Content-Disposition": "attachment; filename=my_time.csv"}),
+                           etag)
 
 @timesheets_bp.route('/export.pdf')
 @login_required
 def export_pdf():
-    start = request.args.get('start')
-    end = request.args.get('end')
-    start = datetime.strptime(start, "%Y-%m-%d").date() if start else (date.today() - timedelta(days=13))
-    end = datetime.strptime(end, "%Y-%m-%d").date() if end else date.today()
-    entries = (TimeEntry.query
-               .filter(TimeEntry.user_id==current_user.id, TimeEntry.work_date.between(start, end))
-               .order_by(TimeEntry.work_date.asc())
+    start, end = _date_range()
+    version = _range_version(start, end)
+    etag = cache_key("timesheet.pdf", current_user.id, start, end, version)
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    E = entry_source(start, end)
+    entries = (db.session.query(E)
+               .filter(E.user_id==current_user.id, E.work_date.between(start, end))
+               .order_by(E.work_date.asc())
                .all())
     pdf = render_pdf_from_template('timesheets/pdf.html', entries=entries, start=start, end=end)
-    return send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True, download_name='my_time.pdf')
+    return with_validators(send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                                     download_name='my_time.pdf'), etag)
@@ -0,0 +1,98 @@
+import calendar
+from datetime import timedelta
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import aliased
+from ..extensions import db
+from ..models.archive import TimeEntryArchive
+from ..models.settings import GlobalSettings
+from ..models.timeentry import TimeEntry
+from .changes import log_change
+from .settings_cache import bump_settings_version, get_settings
+
+# Hot/cold split of time entries. Submitted entries of closed periods are moved (same ids) into
+# time_entry_archive, one calendar month per transaction, and GlobalSettings.archived_through
+# records the last archived day. Reads for ranges after that day see only the hot table; ranges
+# reaching into the archive read hot UNION ALL cold through entry_source(). Days up to
+# archived_through are closed: autosave rejects them and re-costing refuses them.
+
+def archived_through():
+    """Last archived day, or None. Comes from the settings cache (no extra query per call)."""
+    return get_settings()["archived_through"]
+
+def is_closed(d):
+    through = archived_through()
+    return through is not None and d <= through
+
+def entry_source(start, end):
+    """
+    Entity for reading entries in [start, end]: TimeEntry itself while the range lies after the
+    archived periods, else TimeEntry aliased over hot UNION ALL cold, each side pre-filtered to
+    the range so both use their work_date indexes. Use it for reads only, in place of TimeEntry
+    in the query's columns, filters and ordering.
+    """
+    through = archived_through()
+    if through is None or start > through:
+        return TimeEntry
+    hot, cold = TimeEntry.__table__, TimeEntryArchive.__table__
+    both = union_all(
+        select(hot).where(hot.c.work_date.between(start, end)),
+        select(*(cold.c[c.name] for c in hot.c)).where(cold.c.work_date.between(start, end)),
+    ).subquery("time_entry_all")
+    return aliased(TimeEntry, both)
+
+def _open_entries(through):
+    # Entries that can't be archived: unsubmitted, or submitted without a complete cost snapshot
+    return TimeEntry.query.filter(
+        TimeEntry.work_date <= through,
+        (TimeEntry.is_submitted == False) | (TimeEntry.is_submitted == None) |
+        (TimeEntry.hourly_rate_applied == None) | (TimeEntry.burden_percent_applied == None) |
+        (TimeEntry.labor_cost == None) | (TimeEntry.total_cost == None))
+
+def _month_end(d):
+    return d.replace(day=calendar.monthrange(d.year, d.month)[1])
+
+def rollover_periods(through):
+    """
+    (first, last) day of each month-sized period a rollover to `through` moves, oldest first.
+    Raises ValueError if `through` is already archived or an entry up to it is still open.
+    """
+    current = archived_through()
+    if current is not None and through <= current:
+        raise ValueError(f"Entries are already archived through {current}.")
+    open_count = _open_entries(through).count()
+    if open_count:
+        first = _open_entries(through).with_entities(db.func.min(TimeEntry.work_date)).scalar()
+        raise ValueError(f"{open_count} entries up to {through} are not submitted (earliest {first}); "
+                         f"submit them or run `flask purge-empty-entries` first.")
+    # From the day after the watermark, or earlier if submitted entries slipped in behind it
+    oldest = (db.session.query(db.func.min(TimeEntry.work_date))
+              .filter(TimeEntry.work_date <= through).scalar())
+    starts = [d for d in (oldest, current + timedelta(days=1) if current else None) if d is not None]
+    start = min(starts) if starts else through
+    periods = []
+    while start <= through:
+        end = min(_month_end(start), through)
+        periods.append((start, end))
+        start = end + timedelta(days=1)
+    return periods
+
+def archive_period(start, end):
+    """
+    Moves the submitted entries dated [start, end] into the cold table and advances
+    archived_through to `end`, with one ChangeLog row, in one transaction. Commits.
+    Returns the number of entries moved.
+    """
+    hot, cold = TimeEntry.__table__, TimeEntryArchive.__table__
+    in_period = hot.c.work_date.between(start, end) & (hot.c.is_submitted == True)
+    db.session.execute(cold.insert().from_select([c.name for c in hot.c], select(hot).where(in_period)))
+    # Delete exactly the rows copied above, so an entry written meanwhile is never lost
+    copied = select(cold.c.id).where(cold.c.work_date.between(start, end))
+    moved = db.session.execute(hot.delete().where(in_period, hot.c.id.in_(copied))).rowcount
+
+    gs = GlobalSettings.query.order_by(GlobalSettings.id.asc()).first()
+    gs.archived_through = end
+    bump_settings_version()
+    log_change("time_entry_archive", end.isoformat(), "rollover",
+               {"from": start.isoformat(), "through": end.isoformat(), "entries": moved})
+    db.session.commit()
+    return moved
@@ -0,0 +1,63 @@
+from sqlalchemy import exists, inspect, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..extensions import db
+from ..models.settings import AppSetting, GlobalSettings
+
+# One-time database bootstrap: tables for a fresh database plus the singleton settings rows.
+# Run it once per deploy (`flask bootstrap --migrate`, which applies the Alembic migrations first);
+# create_app only does it itself with BOOTSTRAP_ON_START=1 (local development), so web workers
+# boot without touching the database.
+
+DEFAULT_ROWS = (
+    (GlobalSettings, {"burden_percent": 0.0}),
+    (AppSetting, {"overtime_threshold_hours_per_day": 8, "overtime_multiplier": 1.5,
+                  "doubletime_threshold_hours_per_day": 12, "doubletime_multiplier": 2.0}),
+)
+
+def _insert_default(model, values):
+    """
+    INSERT the settings row as id 1 unless the table already has a row, in one statement. Runs
+    racing at the same time all target id 1, so ON CONFLICT lets exactly one of them insert.
+    Returns True if this call inserted the row.
+    """
+    table = model.__table__
+    columns = ["id", *values]
+    rows = select(literal(1), *(literal(v) for v in values.values())).where(~exists().select_from(table))
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(table).from_select(columns, rows).on_conflict_do_nothing(index_elements=["id"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(table).from_select(columns, rows).on_conflict_do_nothing(index_elements=["id"])
+    else:
+        stmt = insert(table).from_select(columns, rows)
+    inserted = db.session.execute(stmt).rowcount == 1
+    if inserted and dialect == "postgresql":
+        # An explicit id doesn't advance the serial sequence; move it past the row
+        db.session.execute(db.text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                                   f"(SELECT max(id) FROM {table.name}))"))
+    return inserted
+
+def ensure_default_settings():
+    """Creates the default GlobalSettings/AppSetting rows if missing. Commits; safe to run concurrently."""
+    created = [model.__name__ for model, values in DEFAULT_ROWS if _insert_default(model, values)]
+    db.session.commit()
+    return created
+
+def migrate_database():
+    """
+    Brings the schema to the latest migration. A database that already has tables is upgraded
+    (new columns and indexes, which create_all() never adds); an empty one gets create_all() and
+    is stamped at head, since the migrations start from the original schema rather than from nothing.
+    """
+    from flask_migrate import stamp, upgrade
+
+    if inspect(db.engine).has_table("time_entry"):
+        upgrade()
+    else:
+        db.create_all()
+        stamp()
+
+def bootstrap_database():
+    """create_all() for tables a fresh database lacks, then the default rows. Returns the rows created."""
+    db.create_all()
+    return ensure_default_settings()
@@ -1,14 +1,157 @@
+import atexit
 import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from flask import current_app, has_app_context
 from flask_login import current_user
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
 from ..extensions import db
 from ..models.changelog import ChangeLog
 
+# Audit events are buffered on the session and written with one multi-row INSERT.
+# AUDIT_FLUSH_MODE="inline" (default) writes them inside the committing transaction;
+# "deferred" hands them to a background writer after the commit succeeds. Each row remembers the
+# (possibly nested) transaction that logged it, so rolling back a SAVEPOINT drops its rows too.
+_BUFFER_KEY = "changelog_buffer"
+_INSERT_CHUNK = 500
+
 def log_change(table, record_id, action, details=None):
-    entry = ChangeLog(
+    session = db.session()
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(_BUFFER_KEY, []).append((transaction, dict(
         table_name=table,
         record_id=str(record_id),
         action=action,
         changed_by=(current_user.id if getattr(current_user, 'is_authenticated', False) else None),
-        details=json.dumps(details or {})
-    )
-    db.session.add(entry)
+        timestamp=datetime.utcnow(),
+        details=json.dumps(details or {}),
+    )))
+
+def _pop_rows(session):
+    return [row for _, row in session.info.pop(_BUFFER_KEY, None) or ()]
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+def _write(conn, rows):
+    for i in range(0, len(rows), _INSERT_CHUNK):
+        conn.execute(insert(ChangeLog).values(rows[i:i + _INSERT_CHUNK]))
+
+def _flush_mode():
+    return current_app.config.get("AUDIT_FLUSH_MODE", "inline") if has_app_context() else "inline"
+
+@event.listens_for(Session, "before_commit")
+def _flush_inline(session):
+    # The commit hooks also fire when a SAVEPOINT is released; the rows wait for the real commit
+    if session.info.get(_BUFFER_KEY) and _flush_mode() != "deferred" and not session.in_nested_transaction():
+        _write(session, _pop_rows(session))
+
+@event.listens_for(Session, "after_commit")
+def _flush_deferred(session):
+    if session.in_nested_transaction():
+        return
+    rows = _pop_rows(session)
+    if rows:
+        # Marked as writing first, so a RoutingSession in a @read_replica view can't hand out the replica
+        session.info["wrote"] = True
+        _writer.submit(session.get_bind(mapper=ChangeLog.__mapper__), rows)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_savepoint(session, previous_transaction):
+    # Rows logged inside a rolled-back SAVEPOINT (or a transaction nested in it) are rolled back with it
+    buffered = session.info.get(_BUFFER_KEY)
+    if buffered and previous_transaction.nested:
+        session.info[_BUFFER_KEY] = [(t, row) for t, row in buffered if not _within(t, previous_transaction)]
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard(session, transaction):
+    # Anything still buffered when the outermost transaction ends was rolled back (or never committed)
+    if transaction.parent is None:
+        session.info.pop(_BUFFER_KEY, None)
+
+
+class _AuditWriter:
+    """Background thread that writes deferred audit rows in batches on its own connection."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, engine, rows):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((engine, rows))
+
+    def _run(self):
+        while True:
+            engine, rows = self._queue.get()
+            # Coalesce whatever else is already waiting for the same engine
+            while len(rows) < _INSERT_CHUNK * 10:
+                try:
+                    more_engine, more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more_engine is not engine:
+                    self._queue.put((more_engine, more))
+                    break
+                rows = rows + more
+            try:
+                with engine.begin() as conn:
+                    _write(conn, rows)
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to write %d deferred audit rows", len(rows))
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+_writer = _AuditWriter()
+atexit.register(_writer.drain)
+
+def flush_deferred_changes():
+    """Blocks until every deferred audit row queued so far has been written."""
+    _writer.drain()
+
+def _old_autosaves(before):
+    return ChangeLog.action == "autosave", ChangeLog.timestamp < before
+
+def autosave_batch_query(before, after, batch_size):
+    """Ids of the next batch of autosave rows older than `before`, past id `after`."""
+    return (db.session.query(ChangeLog.id)
+            .filter(*_old_autosaves(before), ChangeLog.id > after)
+            .order_by(ChangeLog.id)
+            .limit(batch_size))
+
+def compact_autosave_log(before, batch_size=5000):
+    """
+    Deletes `autosave` ChangeLog rows older than `before`, keeping the newest one per record.
+    Works in batches so the table is never locked for long. Returns the number of rows deleted.
+    Commits after each batch.
+    """
+    # The newest row per record, computed once rather than re-grouped for every batch
+    keep = {r[0] for r in (db.session.query(db.func.max(ChangeLog.id))
+                           .filter(*_old_autosaves(before))
+                           .group_by(ChangeLog.table_name, ChangeLog.record_id))}
+    deleted, after = 0, 0
+    while True:
+        ids = [r[0] for r in autosave_batch_query(before, after, batch_size)]
+        if not ids:
+            return deleted
+        after = ids[-1]
+        doomed = [i for i in ids if i not in keep]
+        if doomed:
+            ChangeLog.query.filter(ChangeLog.id.in_(doomed)).delete(synchronize_session=False)
+            db.session.commit()
+        deleted += len(doomed)
@@ -0,0 +1,37 @@
+import time
+from flask import Response, current_app, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+from .export_cache import cache_key
+
+# Conditional GET for data-driven views and exports: callers fingerprint their data with one cheap
+# probe (max updated_at + row count over the scope) and return 304 Not Modified before running the
+# real query or render when the client's copy is still current. Validation is by ETag only: no single
+# date changes on a delete or a wage/settings change, so a Last-Modified could answer 304 wrongly.
+
+def page_etag(*parts):
+    """
+    ETag for an HTML page built from `parts` (the data fingerprint). Also covers the viewer and
+    their CSRF token, rotated at half the token lifetime so a cached page never posts an expired token.
+    """
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    epoch = int(time.time() // (limit / 2)) if limit else 0
+    return cache_key("page", getattr(current_user, "id", None), session.get("csrf_token"), epoch, *parts)
+
+def not_modified(etag):
+    """
+    A 304 response if the request's If-None-Match still matches, else None.
+    Pages with flash messages waiting to be shown always render.
+    """
+    if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+        return None
+    if is_resource_modified(request.environ, etag=etag):
+        return None
+    return with_validators(Response(status=304), etag)
+
+def with_validators(response, etag):
+    # Weak: equal data, but the rendered bytes (e.g. CSRF tokens) may differ
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
@@ -1,6 +1,9 @@
+from bisect import bisect_right
+from itertools import islice
 from ..extensions import db
 from ..models.wage import WageRate
-from ..models.settings import GlobalSettings
+from .overtime import entry_buckets, get_overtime_rules, paid_hours
+from .settings_cache import get_settings
 
 def get_effective_wage(user_id, work_date) -> float:
     # Most recent rate whose effective_date <= work_date
@@ -11,30 +14,38 @@ def get_effective_wage(user_id, work_date) -> float:
     return float(rate.hourly_rate) if rate else 0.0
 
 def get_current_burden_percent() -> float:
-    s = GlobalSettings.query.first()
-    return float(s.burden_percent if s else 0.0)
+    return float(get_settings()["burden_percent"])
 
-def assign_snapshot_cost(entry):
+def _buckets_for_entry(entry, rules):
+    # Regular/OT/DT split for one entry, in the context of the rest of its user-day
+    if entry.id is None:
+        db.session.flush()
+    return entry_buckets([entry.user_id], entry.work_date, entry.work_date, rules).get(entry.id)
+
+def assign_snapshot_cost(entry, rate=None, burden=None, buckets=None, rules=None):
     """
-    Mutates a TimeEntry to set snapshot cost fields based on hours, effective wage at work_date,
-    and current global burden %. Does not commit.
+    Mutates a TimeEntry to set snapshot cost fields based on hours (split into regular/OT/DT
+    for its day), effective wage at work_date, and current global burden %. Batch callers pass
+    the pre-resolved rate, burden, buckets and rules. Does not commit.
     """
-    rate = get_effective_wage(entry.user_id, entry.work_date)
-    burden = get_current_burden_percent()
-    labor = (entry.hours or 0.0) * rate
-    total = labor * (1.0 + burden / 100.0)
+    if rate is None:
+        rate = get_effective_wage(entry.user_id, entry.work_date)
+    if burden is None:
+        burden = get_current_burden_percent()
+    if rules is None:
+        rules = get_overtime_rules()
+    if buckets is None:
+        buckets = _buckets_for_entry(entry, rules)
+    cost = _compute_cost(entry.hours, rate, burden, buckets, rules)
 
-    entry.hourly_rate_applied = rate
-    entry.burden_percent_applied = burden
-    entry.labor_cost = round(labor, 2)
-    entry.total_cost = round(total, 2)
+    entry.hourly_rate_applied = cost["rate"]
+    entry.burden_percent_applied = cost["burden_percent"]
+    entry.labor_cost = cost["labor_cost"]
+    entry.total_cost = cost["total_cost"]
     return entry
 
-def get_cost_for_entry(entry):
-    """
-    Returns a dict of cost values for reporting. Prefers stored snapshot; if missing (e.g. unsubmitted),
-    computes using current effective wage + current burden.
-    """
+def _snapshot_cost(entry):
+    """Stored snapshot as a cost dict, or None if any snapshot field is missing."""
     if (entry.hourly_rate_applied is not None and
         entry.burden_percent_applied is not None and
         entry.labor_cost is not None and
@@ -45,11 +56,12 @@ def get_cost_for_entry(entry):
             "labor_cost": float(entry.labor_cost),
             "total_cost": float(entry.total_cost),
         }
+    return None
 
-    # Fallback compute (not persisted)
-    rate = get_effective_wage(entry.user_id, entry.work_date)
-    burden = get_current_burden_percent()
-    labor = (entry.hours or 0.0) * rate
+def _compute_cost(hours, rate, burden, buckets=None, rules=None):
+    # With a regular/OT/DT split, OT and DT hours are paid at their multipliers
+    paid = paid_hours(buckets, rules) if buckets and rules else (hours or 0.0)
+    labor = paid * rate
     total = labor * (1.0 + burden / 100.0)
     return {
         "rate": float(rate),
@@ -57,3 +69,117 @@ def get_cost_for_entry(entry):
         "labor_cost": round(labor, 2),
         "total_cost": round(total, 2),
     }
+
+def snapshot_params(rows, timelines, burden, buckets, rules):
+    """
+    assign_snapshot_cost for many entries at once. `rows` expose id, user_id, work_date and hours;
+    wages come from pre-loaded `timelines` and the OT/DT split from an entry_buckets() map.
+    A `burden` of None keeps each row's own burden_percent_applied (re-costing existing snapshots).
+    Returns one dict per row keyed "entry_id" plus the snapshot column names, ready to be
+    executemany'd against an UPDATE ... WHERE id = :entry_id.
+    """
+    params = []
+    for r in rows:
+        b = burden if burden is not None else float(r.burden_percent_applied or 0.0)
+        cost = _compute_cost(r.hours, wage_from_timeline(timelines, r.user_id, r.work_date), b,
+                             buckets.get(r.id), rules)
+        params.append({
+            "entry_id": r.id,
+            "hourly_rate_applied": cost["rate"],
+            "burden_percent_applied": cost["burden_percent"],
+            "labor_cost": cost["labor_cost"],
+            "total_cost": cost["total_cost"],
+        })
+    return params
+
+def get_cost_for_entry(entry):
+    """
+    Returns a dict of cost values for reporting. Prefers stored snapshot; if missing (e.g. unsubmitted),
+    computes using current effective wage + current burden.
+    """
+    snap = _snapshot_cost(entry)
+    if snap is not None:
+        return snap
+
+    # Fallback compute (not persisted)
+    rate = get_effective_wage(entry.user_id, entry.work_date)
+    burden = get_current_burden_percent()
+    rules = get_overtime_rules()
+    return _compute_cost(entry.hours, rate, burden, _buckets_for_entry(entry, rules), rules)
+
+def load_wage_timelines(user_ids, until=None):
+    """
+    Loads wage histories for many users in one query.
+    Returns {user_id: ([effective_date, ...], [hourly_rate, ...])} sorted by effective_date.
+    """
+    timelines = {}
+    user_ids = set(user_ids)
+    if not user_ids:
+        return timelines
+    for uid, eff, rate in wage_timeline_query(user_ids, until):
+        dates, rates = timelines.setdefault(uid, ([], []))
+        dates.append(eff)
+        rates.append(float(rate))
+    return timelines
+
+def wage_timeline_query(user_ids, until=None):
+    q = (db.session.query(WageRate.user_id, WageRate.effective_date, WageRate.hourly_rate)
+         .filter(WageRate.user_id.in_(user_ids)))
+    if until is not None:
+        q = q.filter(WageRate.effective_date <= until)
+    return q.order_by(WageRate.user_id, WageRate.effective_date.asc())
+
+def wage_from_timeline(timelines, user_id, work_date) -> float:
+    # Same rule as get_effective_wage: most recent rate whose effective_date <= work_date
+    timeline = timelines.get(user_id)
+    if not timeline:
+        return 0.0
+    dates, rates = timeline
+    i = bisect_right(dates, work_date)
+    return rates[i - 1] if i else 0.0
+
+def get_costs_for_entries(entries, timelines=None, burden=None, rules=None):
+    """
+    Batch version of get_cost_for_entry. Returns a list of cost dicts aligned with `entries`.
+    Wage histories, the burden setting, the OT/DT rules and the overtime split are loaded once
+    for the whole list, and only when some entry has no stored snapshot. Pass a `timelines`
+    dict (and `burden`, `rules`) to reuse them across calls; missing users are loaded into it.
+    Entries (or rows) must expose id, user_id, work_date, hours and the snapshot columns.
+    """
+    costs = [_snapshot_cost(e) for e in entries]
+    pending = [i for i, c in enumerate(costs) if c is None]
+    if not pending:
+        return costs
+
+    user_ids = {entries[i].user_id for i in pending}
+    first = min(entries[i].work_date for i in pending)
+    last = max(entries[i].work_date for i in pending)
+    if timelines is None:
+        timelines = load_wage_timelines(user_ids, until=last)
+    else:
+        timelines.update(load_wage_timelines(user_ids - timelines.keys()))
+    if burden is None:
+        burden = get_current_burden_percent()
+    if rules is None:
+        rules = get_overtime_rules()
+    buckets = entry_buckets(user_ids, first, last, rules)
+    for i in pending:
+        e = entries[i]
+        rate = wage_from_timeline(timelines, e.user_id, e.work_date)
+        costs[i] = _compute_cost(e.hours, rate, burden, buckets.get(e.id), rules)
+    return costs
+
+def iter_costs(rows, chunk_size=1000):
+    """
+    Streams (row, cost) pairs for an iterable of entries (or rows exposing the same columns),
+    resolving costs one chunk at a time so memory stays bounded.
+    """
+    timelines = {}
+    burden = get_current_burden_percent()
+    rules = get_overtime_rules()
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, chunk_size))
+        if not batch:
+            return
+        yield from zip(batch, get_costs_for_entries(batch, timelines, burden, rules))
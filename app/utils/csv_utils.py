@@ -1,19 +1,91 @@
-import io, csv, datetime as dt
+import io, csv, json, zlib, datetime as dt
 
-def parse_patrot_csv(file_storage):
-    # Very lightweight parser; expects columns like: Date, Employee, Hours (decimal)
-    data = {}
-    stream = io.StringIO(file_storage.stream.read().decode('utf-8-sig'))
-    reader = csv.DictReader(stream)
-    for row in reader:
-        date_str = (row.get('Date') or row.get('date') or '').strip()
-        hours = float((row.get('Hours') or row.get('hours') or '0').strip() or 0)
+def _parse_date(date_str):
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
         try:
-            d = dt.datetime.strptime(date_str, "%Y-%m-%d").date()
+            return dt.datetime.strptime(date_str, fmt).date()
         except ValueError:
+            pass
+    return None
+
+def iter_patriot_rows(file_storage, skipped=None):
+    """
+    Streams (employee, date, hours) from a Patriot payroll export (columns Date, Employee, Hours)
+    one row at a time, decoding the upload as it is read so large files are never held in memory.
+    Rows with an unreadable date or hours are skipped and counted in skipped["rows"] if given.
+    """
+    text = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            d = _parse_date((row.get('Date') or row.get('date') or '').strip())
             try:
-                d = dt.datetime.strptime(date_str, "%m/%d/%Y").date()
+                hours = float((row.get('Hours') or row.get('hours') or '0').strip() or 0)
             except ValueError:
+                d = None
+            if d is None:
+                if skipped is not None:
+                    skipped["rows"] = skipped.get("rows", 0) + 1
                 continue
+            yield (row.get('Employee') or row.get('employee') or '').strip(), d, hours
+    finally:
+        # Leave the upload's own stream open for Werkzeug to clean up
+        text.detach()
+
+def parse_patriot_totals(file_storage, skipped=None):
+    # {(employee, date): total_hours}; memory grows with employee-days, not with file rows
+    totals = {}
+    for employee, d, hours in iter_patriot_rows(file_storage, skipped):
+        totals[(employee, d)] = totals.get((employee, d), 0.0) + hours
+    return totals
+
+def parse_patrot_csv(file_storage):
+    # Everyone's hours merged per day; kept for single-employee files
+    data = {}
+    for _, d, hours in iter_patriot_rows(file_storage):
         data[d] = data.get(d, 0.0) + hours
     return data  # {date: total_hours}
+
+def stream_csv(header, rows, chunk_rows=500):
+    # Yields CSV text in chunks; the header goes out first so the client gets a byte right away
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(header)
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate(0)
+    for n, row in enumerate(rows, 1):
+        w.writerow(row)
+        if n % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
+def stream_ndjson(records, chunk_rows=500):
+    # Newline-delimited JSON: one compact object per line, yielded in chunks like stream_csv
+    buf = []
+    for n, rec in enumerate(records, 1):
+        buf.append(json.dumps(rec, separators=(",", ":"), default=str))
+        if n % chunk_rows == 0:
+            yield "\n".join(buf) + "\n"
+            buf = []
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+def gzip_stream(chunks, level=6):
+    """
+    Gzip-compresses text chunks on the fly and yields the compressed bytes. The first chunk (the
+    CSV header) is flushed right away so the client gets a byte early; after that the compressor
+    emits blocks as its window fills, so the ratio matches compressing the whole file at once.
+    """
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 16+15: gzip header and trailer
+    first = True
+    for chunk in chunks:
+        out = z.compress(chunk.encode("utf-8"))
+        if first:
+            out += z.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if out:
+            yield out
+    yield z.flush()
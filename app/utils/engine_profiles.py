@@ -0,0 +1,97 @@
+from functools import wraps
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Engine profiles: connection pool sizing, server-side statement timeouts and SQLite pragmas.
+# DB_ENGINE_PROFILE picks one ("auto" chooses by the database URL, "none" keeps SQLAlchemy's
+# defaults); the options are merged over Config.SQLALCHEMY_ENGINE_OPTIONS for the primary and
+# replica binds alike.
+def _profile_for(uri, profile):
+    if profile != "auto":
+        return profile
+    return {"postgresql": "postgres", "sqlite": "sqlite"}.get(make_url(uri).get_backend_name(), "none")
+
+def pool_size(config):
+    """
+    Connections one process needs: a request thread each (GUNICORN_THREADS) plus the in-process
+    export job threads. Capped so WEB_CONCURRENCY workers together stay within DB_MAX_CONNECTIONS.
+    """
+    if config.get("DB_POOL_SIZE"):
+        return int(config["DB_POOL_SIZE"])
+    size = int(config.get("GUNICORN_THREADS", 1)) + int(config.get("EXPORT_JOB_THREADS", 1))
+    budget = config.get("DB_MAX_CONNECTIONS")
+    if budget:
+        per_worker = int(budget) // max(1, int(config.get("WEB_CONCURRENCY", 1)))
+        size = min(size, per_worker - int(config.get("DB_MAX_OVERFLOW", 2)))
+    return max(1, size)
+
+def engine_options(uri, config):
+    """SQLAlchemy create_engine() options for `uri` under the configured profile."""
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    profile = _profile_for(uri, config.get("DB_ENGINE_PROFILE", "auto"))
+    if profile == "postgres":
+        connect_args = dict(options.get("connect_args") or {})
+        timeout = int(config.get("DB_STATEMENT_TIMEOUT_MS", 0))
+        if timeout:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+        # psycopg 3 prepares a statement after it ran this many times; "none" turns it off (PgBouncer)
+        threshold = str(config.get("DB_PREPARE_THRESHOLD", "5")).lower()
+        connect_args["prepare_threshold"] = None if threshold == "none" else int(threshold)
+        options.update(
+            pool_pre_ping=True,
+            pool_size=pool_size(config),
+            max_overflow=int(config.get("DB_MAX_OVERFLOW", 2)),
+            pool_timeout=float(config.get("DB_POOL_TIMEOUT", 10)),
+            pool_recycle=int(config.get("DB_POOL_RECYCLE", 1800)),
+            connect_args=connect_args,
+        )
+    return options
+
+def _sqlite_pragmas(busy_timeout_ms, wal):
+    def on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        # WAL lets readers run alongside the single writer; NORMAL is durable under WAL except on power loss
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+    return on_connect
+
+def _postgres_timeouts(engine):
+    # Statement timeout for the current request (see report_statement_timeout), set once per transaction
+    @event.listens_for(engine, "begin")
+    def _reset(conn):
+        conn.info.pop("statement_timeout", None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _apply(conn, cursor, statement, parameters, context, executemany):
+        timeout = g.get("_statement_timeout_ms") if has_app_context() else None
+        if timeout and conn.info.get("statement_timeout") != timeout:
+            # On its own plain cursor: `cursor` may be a server-side (named) one, e.g. for yield_per
+            setter = conn.connection.cursor()
+            setter.execute(f"SET LOCAL statement_timeout = {int(timeout)}")
+            setter.close()
+            conn.info["statement_timeout"] = timeout
+
+def init_engine_profiles(app, db):
+    """Installs per-connection setup on every engine; call after db.init_app(app)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            profile = _profile_for(str(engine.url), app.config.get("DB_ENGINE_PROFILE", "auto"))
+            if profile == "sqlite":
+                database = engine.url.database
+                wal = bool(database) and database != ":memory:" and not database.startswith("file::memory:")
+                event.listen(engine, "connect",
+                             _sqlite_pragmas(app.config.get("SQLITE_BUSY_TIMEOUT_MS", 5000), wal))
+            elif profile == "postgres":
+                _postgres_timeouts(engine)
+
+def report_statement_timeout(view):
+    """Applies REPORT_STATEMENT_TIMEOUT_MS to the view's queries (Postgres only; 0 disables)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._statement_timeout_ms = int(current_app.config.get("REPORT_STATEMENT_TIMEOUT_MS", 0))
+        return view(*args, **kwargs)
+    return wrapper
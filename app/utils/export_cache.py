@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import tempfile
+from flask import current_app
+
+# Content-addressed cache for rendered exports on local disk.
+# Keys hash everything that determines the output (filters, viewer scope, data version), so an
+# edit in the range produces a new key and stale files simply age out of the LRU.
+
+def _cache_dir():
+    return current_app.config["EXPORT_CACHE_DIR"]
+
+def _enabled():
+    return int(current_app.config.get("EXPORT_CACHE_MAX_BYTES", 0)) > 0
+
+def cache_key(*parts):
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _path(key, ext):
+    return os.path.join(_cache_dir(), f"{key}.{ext}")
+
+def cache_get(key, ext):
+    """
+    The cached file opened for binary reading, or None. A hit refreshes the file's LRU position
+    (its mtime). The caller owns (and closes) the handle; it stays readable even if another
+    worker evicts the file meanwhile.
+    """
+    if not _enabled():
+        return None
+    path = _path(key, ext)
+    try:
+        os.utime(path)
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+def _evict():
+    limit = int(current_app.config.get("EXPORT_CACHE_MAX_BYTES", 0))
+    files = []
+    with os.scandir(_cache_dir()) as it:
+        for f in it:
+            if f.is_file() and not f.name.startswith("."):
+                st = f.stat()
+                files.append((st.st_mtime, st.st_size, f.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def _open_temp():
+    os.makedirs(_cache_dir(), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=_cache_dir(), prefix=".tmp-")
+    return os.fdopen(fd, "wb"), tmp
+
+def cache_put(key, ext, data):
+    """
+    Stores bytes under key (atomically) and evicts least recently used files past the size limit.
+    Returns True if the file is in the cache afterwards; payloads larger than the whole cache
+    are not stored.
+    """
+    if not _enabled() or len(data) > int(current_app.config.get("EXPORT_CACHE_MAX_BYTES", 0)):
+        return False
+    f, tmp = _open_temp()
+    with f:
+        f.write(data)
+    os.replace(tmp, _path(key, ext))
+    _evict()
+    return os.path.exists(_path(key, ext))
+
+def stream_into_cache(key, ext, chunks):
+    """
+    Passes text (or bytes) chunks through while writing them to the cache. The file is published only if the
+    stream runs to completion, so an aborted download never leaves a truncated entry behind. A stream that
+    outgrows the whole cache is still passed through, but its temp file is dropped as soon as it passes the
+    limit instead of evicting every other entry.
+    """
+    if not _enabled():
+        yield from chunks
+        return
+    limit = int(current_app.config.get("EXPORT_CACHE_MAX_BYTES", 0))
+    f, tmp = _open_temp()
+    written = 0
+    done = False
+    try:
+        for chunk in chunks:
+            if f is not None:
+                data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                written += len(data)
+                if written > limit:
+                    f.close()
+                    os.remove(tmp)
+                    f = None
+                else:
+                    f.write(data)
+            yield chunk
+        done = True
+    finally:
+        if f is not None:
+            f.close()
+            if done:
+                os.replace(tmp, _path(key, ext))
+                _evict()
+            else:
+                os.remove(tmp)
@@ -0,0 +1,95 @@
+import threading
+import time
+from flask import current_app, session
+from flask_login import UserMixin, user_logged_in, user_logged_out
+from sqlalchemy import event, inspect
+from ..extensions import db, login_manager
+
+# Identity cache for Flask-Login. The user loader keeps a short-lived claim (id, name, role flags,
+# archived status) in the signed session cookie and answers from it while it is fresh, so
+# @login_required and the role checks cost no query. Anything else read off current_user loads
+# the User row on first use. Role or archive changes invalidate claims at once in this process;
+# other workers pick them up when the claim expires (IDENTITY_CLAIM_TTL seconds, 0 disables), so
+# the TTL is how long a revoked role can still be used there. Keep it short.
+CLAIM_KEY = "_identity"
+CLAIM_FIELDS = ("username", "email", "is_admin", "is_project_manager", "is_accounting", "is_archived")
+
+_lock = threading.Lock()
+_invalidated = {}  # user id -> when this process last saw their claim fields change
+
+class CachedIdentity(UserMixin):
+    """current_user built from a session claim; quacks like User for the fields it carries."""
+
+    def __init__(self, claim):
+        self.id = claim["id"]
+        for name in CLAIM_FIELDS:
+            setattr(self, name, claim[name])
+
+    def __getattr__(self, name):
+        # Only reached for attributes the claim doesn't carry: fall back to the real row
+        if name.startswith("__") or name == "_user":
+            raise AttributeError(name)
+        user = self.__dict__.get("_user")
+        if user is None:
+            from ..models.user import User
+            user = db.session.get(User, self.id)
+            if user is None:
+                # Deleted since the claim was issued; the claim expires within the TTL
+                raise AttributeError(f"{name!r}: user {self.id} no longer exists")
+            self.__dict__["_user"] = user
+        return getattr(user, name)
+
+def _claim_is_fresh(claim, user_id):
+    return (claim is not None and str(claim.get("id")) == str(user_id) and time.time() < claim["exp"]
+            and claim["iat"] > _invalidated.get(claim["id"], 0.0))
+
+def load_user(user_id):
+    ttl = int(current_app.config.get("IDENTITY_CLAIM_TTL", 10))
+    claim = session.get(CLAIM_KEY)
+    if ttl and _claim_is_fresh(claim, user_id):
+        return CachedIdentity(claim)
+
+    from ..models.user import User
+    user = db.session.get(User, int(user_id))
+    if user is None or user.is_archived:
+        session.pop(CLAIM_KEY, None)
+        return None
+    if ttl:
+        now = time.time()
+        session[CLAIM_KEY] = {"id": user.id, "iat": now, "exp": now + ttl,
+                              **{name: getattr(user, name) for name in CLAIM_FIELDS}}
+    return user
+
+def invalidate_identity(user_id):
+    """Makes this process reload `user_id` from the database on their next request."""
+    now = time.time()
+    horizon = now - int(current_app.config.get("IDENTITY_CLAIM_TTL", 10))
+    with _lock:
+        _invalidated[user_id] = now
+        # Claims issued before `horizon` have expired anyway, so older marks can go
+        for uid in [uid for uid, at in _invalidated.items() if at < horizon]:
+            del _invalidated[uid]
+
+def _on_user_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in CLAIM_FIELDS):
+        invalidate_identity(target.id)
+
+def _on_user_delete(mapper, connection, target):
+    invalidate_identity(target.id)
+
+def _drop_claim(sender, user=None):
+    session.pop(CLAIM_KEY, None)
+
+def init_identity(app):
+    """Registers the caching user loader and the User change listeners."""
+    from ..models.user import User
+
+    app.config.setdefault("IDENTITY_CLAIM_TTL", 10)
+    login_manager.user_loader(load_user)
+    if not event.contains(User, "after_update", _on_user_update):
+        event.listen(User, "after_update", _on_user_update)
+        event.listen(User, "after_delete", _on_user_delete)
+    # A fresh login (or logout) never reuses an earlier claim
+    user_logged_in.connect(_drop_claim, app)
+    user_logged_out.connect(_drop_claim, app)
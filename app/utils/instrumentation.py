@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Per-request SQL and render timing. Adds a Server-Timing header to every response and keeps the
+# slowest requests of this process in a ring buffer shown at /admin/performance.
+# Cost per query is two perf_counter() calls and a list append, so it can stay on in production.
+_SLOWEST_KEPT = 5
+_slow_requests = deque(maxlen=200)
+_slow_lock = threading.Lock()
+
+def _stats():
+    return g.get("_perf") if has_request_context() else None
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _stats() is not None:
+        conn.info.setdefault("_perf_t0", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "handle_error")
+def _failed_execute(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so it can't leak
+    starts = context.connection.info.get("_perf_t0") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    starts = conn.info.get("_perf_t0")
+    if stats is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats["queries"] += 1
+    stats["db"] += elapsed
+    slowest = stats["slowest"]
+    if len(slowest) < _SLOWEST_KEPT or elapsed > slowest[-1][0]:
+        slowest.append((elapsed, statement[:500]))
+        slowest.sort(key=lambda s: -s[0])
+        del slowest[_SLOWEST_KEPT:]
+
+def _before_template(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None:
+        stats["_tpl_t0"].append(time.perf_counter())
+
+def _after_template(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None and stats["_tpl_t0"]:
+        stats["template"] += time.perf_counter() - stats["_tpl_t0"].pop()
+
+@contextmanager
+def timed(section):
+    """Adds the time spent in the block to the current request's `section` total (e.g. "pdf")."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _stats()
+        if stats is not None:
+            stats[section] = stats.get(section, 0.0) + time.perf_counter() - t0
+
+def slow_requests():
+    """Slow requests recorded by this process, newest first."""
+    with _slow_lock:
+        return list(reversed(_slow_requests))
+
+def init_instrumentation(app):
+    if not app.config.get("PERF_INSTRUMENTATION", True):
+        return
+    global _slow_requests
+    with _slow_lock:
+        _slow_requests = deque(_slow_requests, maxlen=int(app.config.get("PERF_RING_SIZE", 200)))
+    slow_ms = float(app.config.get("SLOW_REQUEST_MS", 500))
+
+    template_rendered.connect(_after_template, app)
+    before_render_template.connect(_before_template, app)
+
+    @app.before_request
+    def _start_timing():
+        g._perf = {"t0": time.perf_counter(), "queries": 0, "db": 0.0, "slowest": [],
+                   "template": 0.0, "pdf": 0.0, "_tpl_t0": []}
+
+    @app.after_request
+    def _server_timing(response):
+        stats = g.get("_perf")
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats["t0"]
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats["db"] * 1000:.1f};desc="{stats["queries"]} queries", '
+            f'tpl;dur={stats["template"] * 1000:.1f}, pdf;dur={stats["pdf"] * 1000:.1f}, '
+            f'app;dur={total * 1000:.1f}'
+        )
+        method, path, endpoint = request.method, request.full_path.rstrip("?"), request.endpoint
+        size = {"bytes": response.content_length}
+        if response.is_streamed:
+            inner = response.response
+
+            def counting():
+                size["bytes"] = 0
+                try:
+                    for chunk in inner:
+                        size["bytes"] += len(chunk)
+                        yield chunk
+                finally:
+                    if hasattr(inner, "close"):
+                        inner.close()
+            response.response = counting()
+
+        # Streamed bodies are produced after this hook, so the ring buffer entry is written on close
+        def record():
+            elapsed = time.perf_counter() - stats["t0"]
+            if elapsed * 1000 < slow_ms:
+                return
+            with _slow_lock:
+                _slow_requests.append({
+                    "at": datetime.utcnow(), "method": method, "path": path, "endpoint": endpoint,
+                    "status": response.status_code, "total_ms": elapsed * 1000,
+                    "queries": stats["queries"], "db_ms": stats["db"] * 1000,
+                    "template_ms": stats["template"] * 1000, "pdf_ms": stats["pdf"] * 1000,
+                    "bytes": size["bytes"],
+                    "slowest": [(t * 1000, sql) for t, sql in stats["slowest"]],
+                })
+        response.call_on_close(record)
+        return response
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from ..extensions import db
+from ..models.exportjob import ExportJob
+
+# Local export job queue: rows in the export_job table, no external broker.
+# EXPORT_JOB_MODE="local" runs jobs on a small thread pool inside the web process that
+# enqueued them; "worker" leaves them for `flask export-worker`. Either way a job is
+# claimed with a conditional UPDATE, so it runs exactly once. A job whose process died is failed
+# once it has been "running" for JOB_STALE_SECONDS; local mode picks up jobs left queued by a
+# restart the first time a process dispatches.
+_HANDLERS = {}
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+_recovered = False
+
+def job_handler(kind):
+    """Registers fn(job, params) -> (bytes, download_name, mimetype) for a job kind."""
+    def decorator(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+def enqueue_job(kind, params, user_id=None):
+    job = ExportJob(id=uuid.uuid4().hex, kind=kind, status="queued", params=json.dumps(params),
+                    created_by=user_id)
+    db.session.add(job)
+    db.session.commit()
+    if current_app.config.get("EXPORT_JOB_MODE", "local") == "local":
+        resume_local_jobs()
+        _submit_local(current_app._get_current_object(), job.id)
+    return job
+
+def fail_stale_jobs():
+    """Fails jobs stuck in "running" past JOB_STALE_SECONDS (their process died). Returns how many. Commits."""
+    before = datetime.utcnow() - timedelta(seconds=current_app.config.get("JOB_STALE_SECONDS", 900))
+    n = (ExportJob.query
+         .filter(ExportJob.status == "running", ExportJob.started_at < before)
+         .update({"status": "failed", "error": "Interrupted: the process running it stopped.",
+                  "finished_at": datetime.utcnow()}, synchronize_session=False))
+    db.session.commit()
+    return n
+
+def resume_local_jobs():
+    """
+    Local mode, once per process: fails stale running jobs and re-dispatches the jobs a restart
+    left queued. The claim keeps a job that several processes pick up from running twice.
+    """
+    global _recovered
+    with _dispatcher_lock:
+        if _recovered:
+            return
+        _recovered = True
+    fail_stale_jobs()
+    app = current_app._get_current_object()
+    for (job_id,) in (db.session.query(ExportJob.id)
+                      .filter(ExportJob.status == "queued")
+                      .order_by(ExportJob.created_at.asc()).all()):
+        _submit_local(app, job_id)
+
+def _submit_local(app, job_id):
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(max_workers=int(app.config.get("EXPORT_JOB_THREADS", 1)),
+                                             thread_name_prefix="export-job")
+
+    def run():
+        with app.app_context():
+            run_job(job_id)
+    _dispatcher.submit(run)
+
+def _claim(job_id):
+    claimed = (ExportJob.query
+               .filter(ExportJob.id == job_id, ExportJob.status == "queued")
+               .update({"status": "running", "started_at": datetime.utcnow()}, synchronize_session=False))
+    db.session.commit()
+    return claimed == 1
+
+def run_job(job_id):
+    """Runs one queued job if nobody else has claimed it. Returns True if it ran here."""
+    if not _claim(job_id):
+        return False
+    job = db.session.get(ExportJob, job_id)
+    try:
+        data, download_name, mimetype = _HANDLERS[job.kind](job, json.loads(job.params or "{}"))
+        out_dir = current_app.config["EXPORT_DIR"]
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{job.id}{os.path.splitext(download_name)[1]}")
+        with open(path, "wb") as f:
+            f.write(data)
+        job.file_path = path
+        job.download_name = download_name
+        job.mimetype = mimetype
+        job.status = "done"
+    except Exception as exc:
+        logging.getLogger(__name__).exception("Export job %s failed", job_id)
+        db.session.rollback()
+        job = db.session.get(ExportJob, job_id)
+        job.status = "failed"
+        job.error = str(exc)[:2000]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+def run_pending_jobs(limit=None):
+    """Runs queued jobs oldest first (used by the standalone worker). Returns how many ran here."""
+    fail_stale_jobs()
+    q = (db.session.query(ExportJob.id)
+         .filter(ExportJob.status == "queued")
+         .order_by(ExportJob.created_at.asc()))
+    if limit:
+        q = q.limit(limit)
+    return sum(1 for (job_id,) in q.all() if run_job(job_id))
+
+def purge_jobs(before):
+    """Deletes finished jobs created before `before`, with their files. Does not commit."""
+    jobs = ExportJob.query.filter(ExportJob.created_at < before,
+                                  ExportJob.status.in_(("done", "failed"))).all()
+    for job in jobs:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    return len(jobs)
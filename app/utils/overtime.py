@@ -0,0 +1,50 @@
+from collections import namedtuple
+from ..extensions import db
+from ..models.timeentry import TimeEntry
+from .settings_cache import get_settings
+
+# Daily thresholds (hours) and pay multipliers, as edited on the admin dashboard
+OvertimeRules = namedtuple("OvertimeRules", "ot_threshold ot_multiplier dt_threshold dt_multiplier")
+
+def get_overtime_rules() -> OvertimeRules:
+    s = get_settings()
+    ot = float(s["overtime_threshold_hours_per_day"])
+    # A doubletime threshold below the overtime one would make OT negative; treat it as equal
+    dt = max(float(s["doubletime_threshold_hours_per_day"]), ot)
+    return OvertimeRules(ot, float(s["overtime_multiplier"]), dt, float(s["doubletime_multiplier"]))
+
+def split_hours(before, hours, rules):
+    """
+    Splits `hours` worked after `before` hours already logged that day into
+    (regular, overtime, doubletime) buckets.
+    """
+    end = before + (hours or 0.0)
+    regular = max(0.0, min(end, rules.ot_threshold) - before)
+    overtime = max(0.0, min(end, rules.dt_threshold) - max(before, rules.ot_threshold))
+    doubletime = max(0.0, end - max(before, rules.dt_threshold))
+    return regular, overtime, doubletime
+
+def paid_hours(buckets, rules) -> float:
+    # Regular-rate equivalent hours for a (regular, overtime, doubletime) split
+    regular, overtime, doubletime = buckets
+    return regular + overtime * rules.ot_multiplier + doubletime * rules.dt_multiplier
+
+def entry_buckets(user_ids, start, end, rules):
+    """
+    {entry_id: (regular, overtime, doubletime)} for every entry of `user_ids` in [start, end].
+    One query: a running SUM(hours) window per user-day (ordered by entry id) gives each entry's
+    position in the day, so hours past a threshold land on the entries logged last.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    rows = running_hours_query(user_ids, start, end)
+    return {eid: split_hours(float(cum) - float(h), float(h), rules) for eid, h, cum in rows}
+
+def running_hours_query(user_ids, start, end):
+    """(id, hours, hours logged that day up to and including this entry) per entry, for entry_buckets."""
+    hours = db.func.coalesce(TimeEntry.hours, 0.0)
+    running = db.func.sum(hours).over(partition_by=(TimeEntry.user_id, TimeEntry.work_date),
+                                      order_by=TimeEntry.id)
+    return (db.session.query(TimeEntry.id, hours, running)
+            .filter(TimeEntry.user_id.in_(user_ids), TimeEntry.work_date.between(start, end)))
@@ -1,10 +1,62 @@
-from flask import render_template
-from xhtml2pdf import pisa
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app, render_template
 from io import BytesIO
+from .instrumentation import timed
+
+_pool = None
+_pool_lock = threading.Lock()
 
 def render_pdf_from_template(template_name, **context):
     html = render_template(template_name, **context)
+    return html_to_pdf(html)
+
+def html_to_pdf(html):
+    # Imported on first use: xhtml2pdf/reportlab take most of a second to import, and most
+    # workers never render a PDF
+    from xhtml2pdf import pisa
+
     result = BytesIO()
-    pisa.CreatePDF(html, dest=result)
+    with timed("pdf"):
+        pisa.CreatePDF(html, dest=result)
     result.seek(0)
     return result.read()
+
+def _get_pool():
+    # Spawned (not forked) so children never inherit DB connections or the worker's threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=int(current_app.config.get("PDF_PROCESSES", 2)),
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def merge_pdfs(parts):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(BytesIO(part))
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+def render_pdf_chunked(template_name, rows, chunk_rows=500, **context):
+    """
+    Renders `rows` through `template_name` in chunks of `chunk_rows`, converts the chunks to PDF
+    in parallel on a process pool and merges them. The template gets `continuation` (not the
+    first chunk) and `more_follows` (not the last chunk) to place headers and totals.
+    """
+    chunks = [rows[i:i + chunk_rows] for i in range(0, len(rows), chunk_rows)] or [rows]
+    if len(chunks) == 1:
+        return render_pdf_from_template(template_name, rows=rows, **context)
+
+    # Templates render here (they need the app); only the xhtml2pdf step runs in the pool
+    pool = _get_pool()
+    futures = [pool.submit(html_to_pdf,
+                           render_template(template_name, rows=chunk, continuation=i > 0,
+                                           more_follows=i < len(chunks) - 1, **context))
+               for i, chunk in enumerate(chunks)]
+    with timed("pdf"):
+        return merge_pdfs([f.result() for f in futures])
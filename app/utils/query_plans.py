@@ -0,0 +1,125 @@
+import json
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from ..extensions import db
+from ..models.assignments import PMProject
+from ..models.timeentry import TimeEntry
+from .archive import archived_through
+from .changes import autosave_batch_query
+from .costing import wage_timeline_query
+from .overtime import running_hours_query
+from .rollups import daily_rollup_rows
+
+# Tables large enough that a full scan on a hot path is a bug
+WATCHED_TABLES = {"time_entry", "time_entry_archive", "change_log", "labor_rollup_daily", "labor_rollup_weekly",
+                  "wage_rate"}
+
+def _sample_ids():
+    # Real ids/dates when the database has data, so Postgres plans against representative values
+    row = db.session.query(TimeEntry.user_id, TimeEntry.project_id, TimeEntry.work_date).first()
+    if row is None:
+        return 1, 1, 1, date.today()
+    pm_id = db.session.query(PMProject.pm_user_id).limit(1).scalar()
+    return row.user_id, row.project_id or 1, pm_id or row.user_id, row.work_date
+
+def _viewer(pm_id=None):
+    # Stand-in for current_user: a PM limited to their assigned projects, or an admin who sees everything
+    pm = pm_id is not None
+    return SimpleNamespace(id=pm_id, is_project_manager=pm, is_admin=not pm, is_accounting=False)
+
+def _report_queries(prefix, start, end, uid, pid, pm_uid):
+    """The queries behind one /reports/results request, for a range, per filter and viewer."""
+    from ..reports.routes import _live_cost_query, _page_query, _scoped_query, _totals_query, _version_query
+
+    def scoped(viewer, **filters):
+        params = {"start": start.isoformat(), "end": end.isoformat(), "include_archived": True,
+                  "user_id": None, "project_id": None, **filters}
+        return _scoped_query(params, viewer)[0]
+
+    admin = _viewer()
+    by_user, by_project = scoped(admin, user_id=uid), scoped(admin, project_id=pid)
+    every, pm_scoped = scoped(admin), scoped(_viewer(pm_uid))
+    return [
+        (f"{prefix} by user", _page_query(by_user, 100)),
+        (f"{prefix} by project", _page_query(by_project, 100)),
+        (f"{prefix} by range", _page_query(every, 100)),
+        (f"{prefix} by range, next page", _page_query(every, 100, after=(start, 1))),
+        (f"{prefix} PM scope", _page_query(pm_scoped, 100)),
+        (f"{prefix} version by user", _version_query(by_user)),
+        (f"{prefix} version by project", _version_query(by_project)),
+        (f"{prefix} version PM scope", _version_query(pm_scoped)),
+        (f"{prefix} totals by user", _totals_query(by_user)),
+        (f"{prefix} totals by project", _totals_query(by_project)),
+        (f"{prefix} totals PM scope", _totals_query(pm_scoped)),
+        (f"{prefix} live costing by user", _live_cost_query(by_user)),
+        (f"{prefix} live costing PM scope", _live_cost_query(pm_scoped)),
+    ]
+
+def production_queries():
+    """(name, SQLAlchemy statement) for each hot query, built by the same helpers the routes use."""
+    from ..timesheets.routes import _daily_totals_query, _prefetch_query, _user_entries
+
+    uid, pid, pm_uid, day = _sample_ids()
+    start, end = day - timedelta(days=13), day
+    queries = [
+        ("timesheets.index", _user_entries(uid, start, end)),
+        ("timesheets.save prefetch", _prefetch_query(uid, [start, end])),
+        ("timesheets daily totals", _daily_totals_query(uid, [start, end])),
+        ("overtime buckets", running_hours_query([uid], start, end)),
+        *_report_queries("reports", start, end, uid, pid, pm_uid),
+        ("wage timelines", wage_timeline_query([uid], end)),
+        ("rollup refresh", daily_rollup_rows(uid, [day])),
+        ("changelog compaction", autosave_batch_query(datetime(day.year, day.month, day.day), 0, 5000)),
+    ]
+    through = archived_through()
+    if through is not None:
+        # A range straddling the archive watermark reads hot UNION ALL cold
+        queries += _report_queries("reports across archive", through - timedelta(days=13),
+                                   through + timedelta(days=14), uid, pid, pm_uid)
+    return [(name, q.statement) for name, q in queries]
+
+def _compile(stmt):
+    sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    # SQLite spells OFFSET without LIMIT as "LIMIT -1 OFFSET n", and that -1 stays a bind parameter
+    return sql.replace("LIMIT ? OFFSET", "LIMIT -1 OFFSET")
+
+def _full_scans_sqlite(sql):
+    plan = db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql)).all()
+    # "SCAN t" (optionally "USING [COVERING] INDEX") reads the whole table or index; "SEARCH" is a seek
+    return [detail for *_, detail in plan
+            if detail.startswith("SCAN ") and detail.split()[1] in WATCHED_TABLES], \
+        [detail for *_, detail in plan]
+
+def _full_scans_postgres(sql):
+    plan = db.session.execute(db.text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, lines = [], []
+
+    def walk(node):
+        lines.append(f"{node['Node Type']} {node.get('Relation Name', '')}".strip())
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES:
+            scans.append(lines[-1])
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(plan[0]["Plan"])
+    return scans, lines
+
+def check_query_plans():
+    """
+    EXPLAINs every production query against the configured database.
+    Returns [(name, full_scans, plan_lines)]; a non-empty full_scans list is a failure.
+    Run it against a large seeded database: on tiny tables Postgres rightly prefers seq scans.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        explain = _full_scans_sqlite
+    elif dialect == "postgresql":
+        explain = _full_scans_postgres
+    else:
+        raise RuntimeError(f"No plan checker for {dialect}")
+    results = []
+    for name, stmt in production_queries():
+        scans, lines = explain(_compile(stmt))
+        results.append((name, scans, lines))
+    return results
@@ -0,0 +1,66 @@
+from ..extensions import db
+from ..models.user import User
+from .archive import entry_source
+
+def match_employees(names):
+    """
+    Maps Patriot employee names to users by username or email (case-insensitive), loading
+    all users in one query. Returns ({name: user}, [unmatched names]).
+    """
+    by_key = {}
+    for u in User.query.all():
+        for key in (u.username, u.email):
+            if key:
+                by_key.setdefault(key.strip().lower(), u)
+    matched, unmatched = {}, []
+    for name in sorted(names):
+        u = by_key.get(name.lower())
+        if u is None:
+            unmatched.append(name)
+        else:
+            matched[name] = u
+    return matched, unmatched
+
+def entered_totals(user_ids, start, end):
+    # {(user_id, work_date): hours} for many users in one GROUP BY
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    E = entry_source(start, end)
+    q = (db.session.query(E.user_id, E.work_date, db.func.sum(E.hours))
+         .filter(E.user_id.in_(user_ids), E.work_date.between(start, end))
+         .group_by(E.user_id, E.work_date))
+    return {(uid, d): float(h or 0.0) for uid, d, h in q}
+
+def reconcile_patriot(totals, tolerance_hours, only_user_id=None, default_user=None):
+    """
+    Compares Patriot {(employee, date): hours} totals with entered hours for every matched user
+    and day in the file's date range. Days with entered hours but no Patriot row count as
+    Patriot 0. Pass `only_user_id` to reconcile a single user's rows; rows without an employee
+    name (single-employee exports) are attributed to `default_user`.
+    Returns {"mismatches": [...], "unmatched": [names], "patriot": {(user_id, date): hours},
+    "users": {user_id: user}}.
+    """
+    matched, unmatched = match_employees({name for name, _ in totals if name})
+    if default_user is not None:
+        matched[""] = default_user
+    patriot = {}
+    for (name, d), hours in totals.items():
+        u = matched.get(name)
+        if u is None or (only_user_id is not None and u.id != only_user_id):
+            continue
+        patriot[(u.id, d)] = patriot.get((u.id, d), 0.0) + hours
+    present = {uid for uid, _ in patriot}
+    users = {u.id: u for u in matched.values() if u.id in present}
+    if not patriot:
+        return {"mismatches": [], "unmatched": unmatched, "patriot": patriot, "users": users}
+
+    days = [d for _, d in patriot]
+    entered = entered_totals(users, min(days), max(days))
+    mismatches = []
+    for key in sorted(patriot.keys() | entered.keys(), key=lambda k: (k[1], users[k[0]].username or "")):
+        p, e = patriot.get(key, 0.0), entered.get(key, 0.0)
+        if abs(p - e) > tolerance_hours:
+            mismatches.append({"user": users[key[0]], "date": key[1], "patriot": p, "entered": e,
+                               "diff": round(e - p, 2)})
+    return {"mismatches": mismatches, "unmatched": unmatched, "patriot": patriot, "users": users}
@@ -0,0 +1,159 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from flask import current_app
+from ..extensions import db
+from ..models.recost import RecostRun
+from ..models.timeentry import TimeEntry
+from .archive import archived_through, is_closed
+from .changes import log_change
+from .costing import load_wage_timelines, snapshot_params
+from .jobs import job_handler
+from .overtime import entry_buckets, get_overtime_rules
+from .rollups import refresh_rollups, refresh_unsubmitted_rollups
+
+# Retroactive re-costing: recomputes the cost snapshot of submitted entries after a back-dated
+# wage (or burden) correction. Entries are walked in (user_id, work_date, id) order in chunks;
+# each chunk is one bulk UPDATE of the rows whose cost actually changed, one summarized ChangeLog
+# row and a checkpoint on the RecostRun, committed together.
+DEFAULT_CHUNK_ROWS = 5000
+
+_SNAPSHOT_COLUMNS = ("hourly_rate_applied", "burden_percent_applied", "labor_cost", "total_cost")
+
+def _scope(run):
+    q = (db.session.query(TimeEntry.id, TimeEntry.user_id, TimeEntry.work_date, TimeEntry.hours,
+                          TimeEntry.hourly_rate_applied, TimeEntry.burden_percent_applied,
+                          TimeEntry.labor_cost, TimeEntry.total_cost)
+         .filter(TimeEntry.is_submitted == True,
+                 TimeEntry.work_date.between(run.start_date, run.end_date)))
+    if run.user_id:
+        q = q.filter(TimeEntry.user_id == run.user_id)
+    return q
+
+def start_recost(start, end, user_id=None, burden_percent=None, created_by=None):
+    """
+    Creates a pending RecostRun for the scope, with its entry count for progress. Commits.
+    Raises ValueError if the range reaches into archived (closed) periods.
+    """
+    if is_closed(start):
+        raise ValueError(f"Entries through {archived_through()} are archived; closed periods can't be re-costed.")
+    run = RecostRun(start_date=start, end_date=end, user_id=user_id, burden_percent=burden_percent,
+                    status="pending", created_by=created_by, total=0, processed=0, changed=0,
+                    labor_delta=0.0, total_delta=0.0)
+    run.total = _scope(run).order_by(None).count()
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+def _stale_before():
+    return datetime.utcnow() - timedelta(seconds=current_app.config.get("JOB_STALE_SECONDS", 900))
+
+def is_resumable(run):
+    """Failed runs, and "running" ones that stopped checkpointing (their process died)."""
+    return run.status == "failed" or (run.status == "running" and run.updated_at < _stale_before())
+
+def _claim(run):
+    # Conditional UPDATE, so two resumes of the same run can't both process it
+    claimable = (RecostRun.status.in_(("pending", "failed")) |
+                 ((RecostRun.status == "running") & (RecostRun.updated_at < _stale_before())))
+    claimed = (RecostRun.query
+               .filter(RecostRun.id == run.id, claimable)
+               .update({"status": "running", "error": None, "updated_at": datetime.utcnow()},
+                       synchronize_session=False))
+    db.session.commit()
+    return claimed == 1
+
+def _next_chunk(run, chunk_rows):
+    q = _scope(run)
+    if run.cursor_entry_id is not None:
+        u, d, i = run.cursor_user_id, run.cursor_work_date, run.cursor_entry_id
+        q = q.filter((TimeEntry.user_id > u) |
+                     ((TimeEntry.user_id == u) & (TimeEntry.work_date > d)) |
+                     ((TimeEntry.user_id == u) & (TimeEntry.work_date == d) & (TimeEntry.id > i)))
+    return q.order_by(TimeEntry.user_id, TimeEntry.work_date, TimeEntry.id).limit(chunk_rows).all()
+
+def run_recost(run, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """
+    Runs (or resumes) `run` from its checkpoint until the scope is exhausted. Calls
+    progress(run, chunk_summary) after each committed chunk. Returns the per-chunk summaries.
+    OT/DT rules are today's; wages come from the current WageRate history. Once done, the rollups
+    of unsubmitted entries in the run's user scope are refreshed too. Raises ValueError if the
+    run is done or another process is working on it.
+    """
+    if not _claim(run):
+        raise ValueError(f"Re-costing run {run.id} is {run.status}; only pending, failed or stalled runs can run.")
+    rules = get_overtime_rules()
+    timelines = {}
+    summaries = []
+    try:
+        while True:
+            rows = _next_chunk(run, chunk_rows)
+            if not rows:
+                break
+            summaries.append(_recost_chunk(run, rows, rules, timelines))
+            if progress:
+                progress(run, summaries[-1])
+    except Exception as exc:
+        db.session.rollback()
+        run.status = "failed"
+        run.error = str(exc)[:2000]
+        db.session.commit()
+        raise
+    # The wage correction behind the run also changes the live estimate of unsubmitted entries
+    refresh_unsubmitted_rollups(run.user_id)
+    run.status = "done"
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return summaries
+
+def _recost_chunk(run, rows, rules, timelines):
+    user_ids = {r.user_id for r in rows}
+    missing = user_ids - timelines.keys()
+    if missing:
+        timelines.update(load_wage_timelines(missing, until=run.end_date))
+        timelines.update({uid: ([], []) for uid in missing - timelines.keys()})
+    # The OT/DT split needs whole user-days, so buckets cover the chunk's full date span
+    buckets = entry_buckets(user_ids, min(r.work_date for r in rows), max(r.work_date for r in rows), rules)
+
+    changed, labor_delta, total_delta = [], 0.0, 0.0
+    for r, p in zip(rows, snapshot_params(rows, timelines, run.burden_percent, buckets, rules)):
+        if any(getattr(r, c) is None or abs(float(getattr(r, c)) - p[c]) > 1e-9 for c in _SNAPSHOT_COLUMNS):
+            changed.append((r, p))
+            labor_delta += p["labor_cost"] - float(r.labor_cost or 0.0)
+            total_delta += p["total_cost"] - float(r.total_cost or 0.0)
+
+    if changed:
+        t = TimeEntry.__table__
+        db.session.execute(t.update().where(t.c.id == db.bindparam("entry_id")), [p for _, p in changed])
+        days = {}
+        for r, _ in changed:
+            days.setdefault(r.user_id, set()).add(r.work_date)
+        for uid, dates in days.items():
+            refresh_rollups(uid, dates)
+
+    last = rows[-1]
+    summary = {"run": run.id, "first_id": rows[0].id, "last_id": last.id, "entries": len(rows),
+               "changed": len(changed), "users": len(user_ids),
+               "from": str(min(r.work_date for r in rows)), "to": str(max(r.work_date for r in rows)),
+               "labor_delta": round(labor_delta, 2), "total_delta": round(total_delta, 2)}
+    if changed:
+        log_change("recost_run", run.id, "recosted", summary)
+    run.cursor_user_id, run.cursor_work_date, run.cursor_entry_id = last.user_id, last.work_date, last.id
+    run.processed += len(rows)
+    run.changed += len(changed)
+    run.labor_delta = round(run.labor_delta + labor_delta, 2)
+    run.total_delta = round(run.total_delta + total_delta, 2)
+    db.session.commit()
+    return summary
+
+@job_handler("recost")
+def _recost_job(job, params):
+    run = db.session.get(RecostRun, params["run_id"])
+    summaries = run_recost(run)
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["First ID", "Last ID", "Entries", "Changed", "From", "To", "Labor Delta", "Total Delta"])
+    for s in summaries:
+        w.writerow([s["first_id"], s["last_id"], s["entries"], s["changed"], s["from"], s["to"],
+                    f"{s['labor_delta']:.2f}", f"{s['total_delta']:.2f}"])
+    return buf.getvalue().encode("utf-8"), f"recost_{run.id}.csv", "text/csv"
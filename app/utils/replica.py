@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, func, select
+from sqlalchemy.sql import Select
+
+# Optional read replica for the report endpoints and export jobs. Configured with
+# DATABASE_REPLICA_URL (becomes the "replica" bind); without it everything stays on the primary.
+# Only plain SELECTs from views marked @read_replica (or inside use_replica()) are routed, and a
+# session that has written anything reads from the primary for the rest of its life.
+log = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+
+_lag_lock = threading.Lock()
+_lag_state = {}  # replica url -> (checked_at monotonic, usable)
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if clause is not None and not isinstance(clause, Select):
+                self.info["wrote"] = True
+            elif not self.info.get("wrote") and _replica_requested():
+                engine = replica_engine(self._db)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, "before_flush")
+def _mark_flush(session, flush_context, instances):
+    # A flush writes, so everything after it (the flush's own statements included) uses the primary
+    session.info["wrote"] = True
+
+def _replica_requested():
+    return has_app_context() and g.get("_read_replica", False)
+
+def read_replica(view):
+    """Marks a read-only view whose queries may be served by the replica (including streamed bodies)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def use_replica():
+    """
+    Same as @read_replica for code running outside a view, e.g. background export jobs. Reads in
+    the block may go to the replica even if the session wrote earlier (a job claiming itself),
+    so only wrap reads that don't depend on those writes.
+    """
+    info = current_app.extensions["sqlalchemy"].session.info
+    previous, wrote = g.get("_read_replica", False), info.pop("wrote", False)
+    g._read_replica = True
+    try:
+        yield
+    finally:
+        g._read_replica = previous
+        if wrote:
+            info["wrote"] = True
+
+def replica_engine(db):
+    """The replica engine if one is configured and currently within the lag budget, else None."""
+    engine = db.engines.get(REPLICA_BIND)
+    if engine is None:
+        return None
+    interval = float(current_app.config.get("REPLICA_LAG_CHECK_SECONDS", 10))
+    key = str(engine.url)
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_state.get(key)
+        if checked and now - checked[0] < interval:
+            return engine if checked[1] else None
+        # Claim this check window so concurrent requests don't all probe at once
+        _lag_state[key] = (now, checked[1] if checked else False)
+    max_lag = float(current_app.config.get("REPLICA_MAX_LAG_SECONDS", 30))
+    try:
+        lag = replica_lag(db.engines[None], engine)
+        usable = lag <= max_lag
+        if not usable:
+            log.warning("Read replica is %.0fs behind (limit %.0fs); reading from the primary", lag, max_lag)
+    except Exception:
+        log.exception("Read replica lag check failed; reading from the primary")
+        usable = False
+    with _lag_lock:
+        _lag_state[key] = (time.monotonic(), usable)
+    return engine if usable else None
+
+def replica_lag(primary, replica):
+    """
+    Seconds the replica is behind, measured on the audit trail: the age (on the primary) of the
+    oldest ChangeLog row the replica doesn't have yet. Both lookups go through the primary key,
+    and the check works for any pair of databases, including two SQLite files.
+    """
+    from ..models.changelog import ChangeLog  # models import the extension that imports this module
+    with replica.connect() as conn:
+        last = conn.execute(select(func.max(ChangeLog.id))).scalar()
+    with primary.connect() as conn:
+        oldest = conn.execute(select(ChangeLog.timestamp).where(ChangeLog.id > (last or 0))
+                              .order_by(ChangeLog.id).limit(1)).scalar()
+    if oldest is None:
+        return 0.0
+    return max(0.0, (datetime.utcnow() - oldest).total_seconds())
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from datetime import timedelta
+from ..extensions import db
+from ..models.timeentry import TimeEntry
+from ..models.rollup import LaborRollupDaily, LaborRollupWeekly
+from .archive import entry_source
+from .costing import iter_costs
+
+def week_start(d):
+    # Monday of the ISO week containing d
+    return d - timedelta(days=d.weekday())
+
+def _entry_rows(q, entry=TimeEntry):
+    return (q.with_entities(entry.id, entry.user_id, entry.project_id, entry.work_date,
+                            entry.hours, entry.hourly_rate_applied, entry.burden_percent_applied,
+                            entry.labor_cost, entry.total_cost)
+            .order_by(entry.user_id, entry.work_date)
+            .yield_per(1000))
+
+def _aggregate(rows):
+    """{(user_id, project_id, work_date): [hours, labor_cost, total_cost]} for entry rows."""
+    agg = defaultdict(lambda: [0.0, 0.0, 0.0])
+    for r, c in iter_costs(rows):
+        if not r.hours:
+            continue
+        acc = agg[(r.user_id, r.project_id, r.work_date)]
+        acc[0] += r.hours
+        acc[1] += c["labor_cost"]
+        acc[2] += c["total_cost"]
+    return agg
+
+def _daily_values(agg):
+    return [dict(user_id=u, project_id=p, work_date=d, hours=h, labor_cost=round(l, 2), total_cost=round(t, 2))
+            for (u, p, d), (h, l, t) in agg.items()]
+
+def _rebuild_weeks(user_ids, weeks):
+    # Weekly rows are re-derived from the daily rollup, never from raw entries
+    if not user_ids or not weeks:
+        return
+    first, last = min(weeks), max(weeks) + timedelta(days=6)
+    (LaborRollupWeekly.query
+     .filter(LaborRollupWeekly.user_id.in_(user_ids), LaborRollupWeekly.week_start.in_(weeks))
+     .delete(synchronize_session=False))
+    agg = defaultdict(lambda: [0.0, 0.0, 0.0])
+    daily = (db.session.query(LaborRollupDaily.user_id, LaborRollupDaily.project_id, LaborRollupDaily.work_date,
+                              LaborRollupDaily.hours, LaborRollupDaily.labor_cost, LaborRollupDaily.total_cost)
+             .filter(LaborRollupDaily.user_id.in_(user_ids),
+                     LaborRollupDaily.work_date.between(first, last)))
+    for u, p, d, h, l, t in daily:
+        wk = week_start(d)
+        if wk not in weeks:
+            continue
+        acc = agg[(u, p, wk)]
+        acc[0] += h
+        acc[1] += l
+        acc[2] += t
+    values = [dict(user_id=u, project_id=p, week_start=wk, hours=h, labor_cost=round(l, 2), total_cost=round(t, 2))
+              for (u, p, wk), (h, l, t) in agg.items()]
+    if values:
+        db.session.execute(LaborRollupWeekly.__table__.insert(), values)
+
+def daily_rollup_rows(user_id, dates):
+    return LaborRollupDaily.query.filter(LaborRollupDaily.user_id == user_id, LaborRollupDaily.work_date.in_(dates))
+
+def refresh_rollups(user_id, dates):
+    """
+    Recomputes the daily rollup rows for one user's days and the weekly rows of the weeks they fall in.
+    Call after changing entries, before commit. Does not commit.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+    db.session.flush()
+    daily_rollup_rows(user_id, dates).delete(synchronize_session=False)
+    q = TimeEntry.query.filter(TimeEntry.user_id == user_id, TimeEntry.work_date.in_(dates))
+    values = _daily_values(_aggregate(_entry_rows(q)))
+    if values:
+        db.session.execute(LaborRollupDaily.__table__.insert(), values)
+    _rebuild_weeks([user_id], {week_start(d) for d in dates})
+
+def refresh_unsubmitted_rollups(user_id=None):
+    """
+    Refreshes the rollup days holding unsubmitted entries, whose costs are live estimates (today's
+    wages, burden and OT/DT rules). Call after changing any of those, before commit. Does not commit.
+    """
+    unsubmitted = (TimeEntry.is_submitted == False) | (TimeEntry.is_submitted == None)
+    q = db.session.query(TimeEntry.user_id, TimeEntry.work_date).filter(unsubmitted).distinct()
+    if user_id:
+        q = q.filter(TimeEntry.user_id == user_id)
+    days = defaultdict(set)
+    for u, d in q:
+        days[u].add(d)
+    for u, dates in days.items():
+        refresh_rollups(u, dates)
+
+def rebuild_rollups(start, end, chunk_rows=5000):
+    """
+    Backfills both rollup tables for every user over [start, end], widened to whole ISO weeks.
+    Returns the number of daily rows written. Does not commit.
+    """
+    start, end = week_start(start), week_start(end) + timedelta(days=6)
+    LaborRollupDaily.query.filter(LaborRollupDaily.work_date.between(start, end)).delete(synchronize_session=False)
+    LaborRollupWeekly.query.filter(LaborRollupWeekly.week_start.between(start, end)).delete(synchronize_session=False)
+
+    # Archived periods are rebuilt from the cold table too
+    E = entry_source(start, end)
+    values = _daily_values(_aggregate(_entry_rows(
+        db.session.query(E).filter(E.work_date.between(start, end)), E)))
+    for i in range(0, len(values), chunk_rows):
+        db.session.execute(LaborRollupDaily.__table__.insert(), values[i:i + chunk_rows])
+
+    weeks = {week_start(start + timedelta(days=n)) for n in range(0, (end - start).days + 1, 7)}
+    user_ids = sorted({v["user_id"] for v in values})
+    for i in range(0, len(user_ids), 500):
+        _rebuild_weeks(user_ids[i:i + 500], weeks)
+    return len(values)
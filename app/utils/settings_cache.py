@@ -0,0 +1,90 @@
+import threading
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models.settings import AppSetting, GlobalSettings
+
+# Process-local copy of GlobalSettings + AppSetting values, keyed by GlobalSettings.settings_version.
+# Each request (or app context) checks the version once with a single-column read, so a change
+# saved by any worker is picked up on the next request everywhere without re-reading the rows.
+# Values read by a session with uncommitted writes are used but not cached: that transaction may
+# have bumped the version itself and still roll back.
+_lock = threading.Lock()
+_cached = (object(), None)  # (version, values)
+_WROTE_KEY = "settings_cache_uncommitted"
+
+DEFAULTS = {
+    "burden_percent": 0.0,
+    "overtime_threshold_hours_per_day": 8,
+    "overtime_multiplier": 1.5,
+    "doubletime_threshold_hours_per_day": 12,
+    "doubletime_multiplier": 2.0,
+    "archived_through": None,
+}
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear(session, transaction):
+    # Committed or rolled back: either way the session reads committed data again, and a version
+    # memoized during the transaction may have been its own uncommitted bump
+    if transaction.parent is None and session.info.pop(_WROTE_KEY, None) and has_app_context():
+        g.pop("settings_version", None)
+
+def _uncommitted():
+    session = db.session()
+    return bool(session.info.get(_WROTE_KEY) or session.new or session.dirty or session.deleted)
+
+def _current_version():
+    if has_app_context() and "settings_version" in g:
+        return g.settings_version
+    version = (db.session.query(GlobalSettings.settings_version)
+               .order_by(GlobalSettings.id.asc())
+               .limit(1)
+               .scalar())
+    if has_app_context():
+        g.settings_version = version
+    return version
+
+def _load():
+    values = dict(DEFAULTS)
+    gs = GlobalSettings.query.order_by(GlobalSettings.id.asc()).first()
+    if gs:
+        values["burden_percent"] = float(gs.burden_percent)
+        values["archived_through"] = gs.archived_through
+    s = AppSetting.query.order_by(AppSetting.id.asc()).first()
+    if s:
+        for name in ("overtime_threshold_hours_per_day", "overtime_multiplier",
+                     "doubletime_threshold_hours_per_day", "doubletime_multiplier"):
+            values[name] = getattr(s, name)
+    return values
+
+def get_settings():
+    """Current settings values as a dict (see DEFAULTS for the keys). Treat it as read-only."""
+    global _cached
+    version = _current_version()
+    cached_version, values = _cached
+    if version is None or version != cached_version:
+        with _lock:
+            values = _load()
+            if not _uncommitted():
+                _cached = (version, values)
+    return values
+
+def bump_settings_version():
+    """Marks settings as changed for every worker. Call in the same transaction as the change."""
+    global _cached
+    gs = GlobalSettings.query.order_by(GlobalSettings.id.asc()).first()
+    if gs is not None:
+        gs.settings_version = GlobalSettings.settings_version + 1
+    _cached = (object(), None)
+    if has_app_context():
+        g.pop("settings_version", None)
@@ -0,0 +1,9 @@
+"""
+Synthetic-data benchmarks for the report, export and timesheet endpoints.
+
+    python -m benchmarks.run --db /tmp/gsr-bench.sqlite3 --seed
+    python -m benchmarks.run --db /tmp/gsr-bench.sqlite3 --compare benchmarks/results/<earlier>.json
+    python -m benchmarks.startup
+
+See benchmarks/run.py and benchmarks/startup.py for options.
+"""
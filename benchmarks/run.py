@@ -0,0 +1,193 @@
+"""
+Repeatable timings for the heavy endpoints against a seeded SQLite database.
+
+Each benchmark reports the median wall time over --repeat runs, the query count of one run and the
+peak Python memory (tracemalloc, measured in a separate run so it does not skew the timings).
+Results are written to benchmarks/results/<timestamp>.json; pass --compare with an earlier file
+to print the change and flag regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _login(client, user_id):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+
+def _benchmarks(app, end):
+    """(name, user_id, request fn(client), reset fn or None)."""
+    from app.extensions import db
+    from app.models.timeentry import TimeEntry
+
+    month = (end - timedelta(days=30)).isoformat(), end.isoformat()
+    year = (end - timedelta(days=365)).isoformat(), end.isoformat()
+    employee = 3
+    submit_start = end - timedelta(days=13)
+
+    def reset_submit():
+        (TimeEntry.query
+         .filter(TimeEntry.user_id == employee, TimeEntry.work_date.between(submit_start, end))
+         .update({"is_submitted": False, "submitted_at": None, "hourly_rate_applied": None,
+                  "burden_percent_applied": None, "labor_cost": None, "total_cost": None},
+                 synchronize_session=False))
+        db.session.commit()
+
+    return [
+        ("reports.results (month, all users)", 1,
+         lambda c: c.get(f"/reports/results?start={month[0]}&end={month[1]}"), None),
+        ("reports.results (month, PM scope)", 2,
+         lambda c: c.get(f"/reports/results?start={month[0]}&end={month[1]}"), None),
+        ("reports.export_csv (year, all users)", 1,
+         lambda c: c.get(f"/reports/export.csv?start={year[0]}&end={year[1]}"), None),
+        ("reports.export_pdf (month, one user)", 1,
+         lambda c: c.get(f"/reports/export.pdf?start={month[0]}&end={month[1]}&user_id={employee}"), None),
+        ("timesheets.index (14 days)", employee,
+         lambda c: c.get("/timesheets/"), None),
+        ("timesheets.save", employee,
+         lambda c: c.post("/timesheets/save", data={"work_date": end.isoformat(), "hours": "7.5", "notes": "bench"}),
+         None),
+        ("timesheets.submit (14 days)", employee,
+         lambda c: c.post("/timesheets/submit", data={"start": submit_start.isoformat(), "end": end.isoformat()}),
+         reset_submit),
+    ]
+
+
+def run(app, repeat, only=None):
+    from app.extensions import db
+    from app.models.timeentry import TimeEntry
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        end = db.session.query(db.func.max(TimeEntry.work_date)).scalar() or date.today()
+        benchmarks = _benchmarks(app, end)
+
+    results = {}
+    for name, user_id, fn, reset in benchmarks:
+        if only and only not in name:
+            continue
+        client = app.test_client()
+        _login(client, user_id)
+        times = []
+        queries = None
+        size = None
+        for _ in range(repeat):
+            with app.app_context():
+                counter.count = 0
+                t0 = time.perf_counter()
+                resp = fn(client)
+                body = resp.get_data()
+                times.append(time.perf_counter() - t0)
+                queries = counter.count
+                size = len(body)
+                if resp.status_code >= 400:
+                    raise SystemExit(f"{name}: HTTP {resp.status_code}")
+                if reset:
+                    reset()
+
+        # Separate pass for memory: tracemalloc slows allocation-heavy code noticeably
+        with app.app_context():
+            tracemalloc.start()
+            fn(client).get_data()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if reset:
+                reset()
+
+        results[name] = {"median_s": statistics.median(times), "min_s": min(times), "queries": queries,
+                         "peak_mem_kb": peak // 1024, "response_bytes": size}
+        print(f"{name:42} {results[name]['median_s'] * 1000:9.1f} ms  {queries:6d} queries  "
+              f"{results[name]['peak_mem_kb']:8d} KiB peak  {size:10d} B")
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for name, cur in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        dt = (cur["median_s"] - old["median_s"]) / old["median_s"] * 100 if old["median_s"] else 0.0
+        flag = ""
+        if dt > threshold or cur["queries"] > old["queries"]:
+            flag = "  <-- regression"
+            regressions += 1
+        print(f"{name:42} {dt:+7.1f}% time  {cur['queries'] - old['queries']:+6d} queries{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="/tmp/gsr-bench.sqlite3", help="SQLite file to benchmark against.")
+    parser.add_argument("--seed", action="store_true", help="(Re)create the database with synthetic data first.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--wage-changes", type=int, default=12)
+    parser.add_argument("--changelog-rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this text.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown (%%) counted as a regression.")
+    args = parser.parse_args(argv)
+
+    if args.seed and os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    os.environ["BOOTSTRAP_ON_START"] = "1"  # the seeded database needs its tables and settings rows
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, EXPORT_CACHE_MAX_BYTES=0)
+
+    seeded = None
+    if args.seed:
+        from .seed import seed
+        with app.app_context():
+            db.create_all()  # seed.py imports models that create_app may not have loaded yet
+            t0 = time.perf_counter()
+            seeded = seed(users=args.users, projects=args.projects, years=args.years,
+                          wage_changes=args.wage_changes, changelog_rows=args.changelog_rows)
+            print(f"Seeded {seeded['time_entries']} entries in {time.perf_counter() - t0:.1f}s")
+            db.session.execute(db.text("ANALYZE"))
+            db.session.commit()
+
+    results = run(app, args.repeat, args.only)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out, "w") as f:
+        json.dump({"created": datetime.now().isoformat(), "db": args.db, "seed": seeded,
+                   "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"\nSaved {out}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
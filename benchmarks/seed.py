@@ -0,0 +1,107 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+from app.extensions import db
+from app.models.user import User
+from app.models.project import Project
+from app.models.timeentry import TimeEntry
+from app.models.wage import WageRate
+from app.models.changelog import ChangeLog
+from app.models.assignments import PMProject
+from app.models.settings import GlobalSettings
+from app.utils.costing import wage_from_timeline
+
+_CHUNK = 5000
+
+def _insert(table, rows):
+    for i in range(0, len(rows), _CHUNK):
+        db.session.execute(table.insert(), rows[i:i + _CHUNK])
+
+def seed(users=50, projects=40, years=3, wage_changes=12, changelog_rows=200_000, end=None, rng_seed=1234):
+    """
+    Fills an empty database with deterministic synthetic data:
+    `users` employees (plus an admin and a PM), `projects` projects, `years` of weekday time entries
+    (1-3 entries a day, about 1 in 6 days with overtime), `wage_changes` WageRate rows per user spread
+    over the period, and `changelog_rows` audit rows. Everything older than 30 days is submitted with
+    a cost snapshot. Returns a dict describing what was created. Commits.
+    """
+    rng = random.Random(rng_seed)
+    end = end or date.today()
+    start = end - timedelta(days=365 * years)
+
+    def user(uid, name, admin=False, pm=False):
+        return dict(id=uid, username=name, email=f"{name}@example.com", is_admin=admin, is_project_manager=pm,
+                    is_accounting=False, is_archived=False)
+
+    _insert(User.__table__, [user(1, "bench-admin", admin=True), user(2, "bench-pm", pm=True)]
+            + [user(3 + i, f"bench-user-{i:04d}") for i in range(users)])
+    user_ids = list(range(3, 3 + users))
+    _insert(Project.__table__, [dict(id=1 + i, name=f"Bench Project {i:03d}", is_archived=(i % 10 == 9))
+                                for i in range(projects)])
+    project_ids = list(range(1, 1 + projects))
+    _insert(PMProject.__table__, [dict(pm_user_id=2, project_id=pid) for pid in project_ids[::2]])
+
+    wages = []
+    timelines = {}
+    for uid in user_ids:
+        rate = rng.uniform(18, 45)
+        days = sorted(rng.sample(range(1, 365 * years), wage_changes - 1))
+        for n, offset in enumerate([0] + days):
+            wages.append(dict(user_id=uid, effective_date=start + timedelta(days=offset),
+                              hourly_rate=round(rate * (1.03 ** n), 2)))
+            dates, rates = timelines.setdefault(uid, ([], []))
+            dates.append(wages[-1]["effective_date"])
+            rates.append(wages[-1]["hourly_rate"])
+    _insert(WageRate.__table__, wages)
+
+    submitted_before = end - timedelta(days=30)
+    entries = []
+    d = start
+    while d <= end:
+        if d.weekday() < 5:
+            for uid in user_ids:
+                long_day = rng.random() < 1 / 6
+                parts = rng.randint(1, 3)
+                total = rng.uniform(9, 14) if long_day else rng.uniform(6, 8)
+                for _ in range(parts):
+                    hours = round(total / parts, 2)
+                    done = d < submitted_before
+                    row = dict(user_id=uid, project_id=rng.choice(project_ids + [None]), work_date=d, hours=hours,
+                               notes="", is_submitted=done,
+                               submitted_at=datetime.combine(d, datetime.min.time()) if done else None,
+                               created_at=datetime.combine(d, datetime.min.time()),
+                               updated_at=datetime.combine(d, datetime.min.time()),
+                               hourly_rate_applied=None, burden_percent_applied=None, labor_cost=None, total_cost=None)
+                    if done:
+                        rate = wage_from_timeline(timelines, uid, d)
+                        row.update(hourly_rate_applied=rate, burden_percent_applied=25.0,
+                                   labor_cost=round(hours * rate, 2), total_cost=round(hours * rate * 1.25, 2))
+                    entries.append(row)
+        if len(entries) >= 50_000:
+            _insert(TimeEntry.__table__, entries)
+            entries = []
+            db.session.commit()
+        d += timedelta(days=1)
+    _insert(TimeEntry.__table__, entries)
+
+    max_id = db.session.query(db.func.max(TimeEntry.id)).scalar() or 1
+    logs = []
+    for i in range(changelog_rows):
+        logs.append(dict(table_name="timeentry", record_id=str(rng.randint(1, max_id)),
+                         action="autosave" if i % 8 else "submitted", changed_by=rng.choice(user_ids),
+                         timestamp=datetime.combine(start + timedelta(days=i * 365 * years // max(changelog_rows, 1)),
+                                                    datetime.min.time()),
+                         details=json.dumps({"hours": 8})))
+        if len(logs) >= 50_000:
+            _insert(ChangeLog.__table__, logs)
+            logs = []
+    _insert(ChangeLog.__table__, logs)
+    GlobalSettings.query.update({"burden_percent": 25.0, "settings_version": GlobalSettings.settings_version + 1},
+                                synchronize_session=False)
+    db.session.commit()
+
+    return {
+        "users": users, "projects": projects, "years": years, "start": start.isoformat(), "end": end.isoformat(),
+        "time_entries": db.session.query(db.func.count(TimeEntry.id)).scalar(),
+        "wage_rates": len(wages), "changelog_rows": changelog_rows,
+    }
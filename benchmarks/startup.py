@@ -0,0 +1,90 @@
+"""
+Import-time budget for a web worker: how long `import wsgi` (create_app included) takes in a fresh
+interpreter, and which heavy modules it pulls in.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 800 --top 15
+
+Runs with BOOTSTRAP_ON_START=0 against a throwaway SQLite URL, like a deployed worker after
+`flask bootstrap`. Exits non-zero if the median exceeds --budget-ms or a module that should load
+lazily (the PDF stack) was imported.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use only; a worker that imports them at startup pays most of a second for nothing
+LAZY_MODULES = ("xhtml2pdf", "reportlab", "pypdf")
+
+DEFAULT_BUDGET_MS = 1200
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import wsgi
+elapsed = time.perf_counter() - t0
+print(json.dumps({"ms": elapsed * 1000, "lazy": sorted(m for m in %r if m in sys.modules)}))
+""" % (LAZY_MODULES,)
+
+
+def _env(db_path):
+    env = dict(os.environ, BOOTSTRAP_ON_START="0", DATABASE_URL=f"sqlite:///{db_path}")
+    env.pop("DATABASE_REPLICA_URL", None)
+    return env
+
+
+def measure(repeat, env):
+    import json
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=env, check=True,
+                             capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return statistics.median(r["ms"] for r in runs), runs[-1]["lazy"]
+
+
+def top_packages(env, top):
+    """(ms, package) import time summed per top-level package, from python -X importtime self times."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import wsgi"], cwd=ROOT, env=env,
+                         check=True, capture_output=True, text=True).stderr
+    totals = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(((us / 1000, package) for package, us in totals.items()), reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, "startup.sqlite3"))
+        median_ms, lazy = measure(args.repeat, env)
+        print(f"import wsgi: {median_ms:.0f} ms median of {args.repeat} (budget {args.budget_ms:.0f} ms)")
+        for ms, name in top_packages(env, args.top):
+            print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"Over budget by {median_ms - args.budget_ms:.0f} ms")
+        failed = True
+    if lazy:
+        print(f"Imported at startup but should load lazily: {', '.join(lazy)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
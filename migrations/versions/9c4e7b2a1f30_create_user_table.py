@@ -0,0 +1,34 @@
+"""create user table
+Revision ID: 9c4e7b2a1f30
+Revises: 
+Create Date: 2025-08-12 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7b2a1f30'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Databases created by db.create_all() already have the table
+    if sa.inspect(op.get_bind()).has_table('user'):
+        return
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(50), nullable=False, unique=True),
+        sa.Column('email', sa.String(255), nullable=False),
+        sa.Column('password_hash', sa.String(255), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('is_project_manager', sa.Boolean(), nullable=True),
+        sa.Column('is_accounting', sa.Boolean(), nullable=True),
+        sa.Column('is_archived', sa.Boolean(), nullable=True),
+    )
+    op.create_index('ix_user_email', 'user', ['email'], unique=True)
+
+def downgrade():
+    op.drop_index('ix_user_email', table_name='user')
+    op.drop_table('user')
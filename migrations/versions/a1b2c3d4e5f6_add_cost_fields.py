@@ -1,6 +1,6 @@
 """add cost snapshot fields to time_entry
 Revision ID: a1b2c3d4e5f6
-Revises: 
+Revises: 9c4e7b2a1f30
 Create Date: 2025-08-12 17:00:00
 """
 from alembic import op
@@ -8,7 +8,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'a1b2c3d4e5f6'
-down_revision = None
+down_revision = '9c4e7b2a1f30'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,27 @@
+"""carry updated_at in the time_entry user/date index leaf (Postgres) for conditional GET probes
+Revision ID: a6c1e8f4d207
+Revises: f2b8d4a6c913
+Create Date: 2026-10-18 17:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a6c1e8f4d207'
+down_revision = 'f2b8d4a6c913'
+branch_labels = None
+depends_on = None
+
+def _recreate(include):
+    # INCLUDE columns only exist on Postgres; elsewhere the index is unchanged
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_time_entry_user_date_project', table_name='time_entry')
+    op.create_index('ix_time_entry_user_date_project', 'time_entry', ['user_id', 'work_date', 'project_id'],
+                    postgresql_include=include)
+
+def upgrade():
+    _recreate(['hours', 'updated_at'])
+
+def downgrade():
+    _recreate(['hours'])
@@ -0,0 +1,54 @@
+"""add time_entry_archive (cold storage for closed periods) and global_settings.archived_through
+Revision ID: b3f9d2e7a418
+Revises: a6c1e8f4d207
+Create Date: 2026-10-18 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9d2e7a418'
+down_revision = 'a6c1e8f4d207'
+branch_labels = None
+depends_on = None
+
+def _sqlite_autoincrement(enabled):
+    # SQLite reuses rowids above the current max; AUTOINCREMENT keeps archived ids from coming back
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('time_entry', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': enabled}) as batch_op:
+        pass
+
+def upgrade():
+    op.create_table(
+        'time_entry_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('project.id'), nullable=True),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('hours', sa.Float(), nullable=True),
+        sa.Column('notes', sa.String(1000), nullable=True),
+        sa.Column('is_submitted', sa.Boolean(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('hourly_rate_applied', sa.Float(), nullable=True),
+        sa.Column('burden_percent_applied', sa.Float(), nullable=True),
+        sa.Column('labor_cost', sa.Float(), nullable=True),
+        sa.Column('total_cost', sa.Float(), nullable=True),
+    )
+    op.create_index('ix_time_entry_archive_user_date', 'time_entry_archive', ['user_id', 'work_date'])
+    op.create_index('ix_time_entry_archive_project_date', 'time_entry_archive', ['project_id', 'work_date'])
+    op.create_index('ix_time_entry_archive_work_date', 'time_entry_archive', ['work_date'])
+    op.add_column('global_settings', sa.Column('archived_through', sa.Date(), nullable=True))
+    _sqlite_autoincrement(True)
+
+def downgrade():
+    # Archived rows are not moved back; restore them into time_entry before downgrading
+    _sqlite_autoincrement(False)
+    op.drop_column('global_settings', 'archived_through')
+    op.drop_index('ix_time_entry_archive_work_date', table_name='time_entry_archive')
+    op.drop_index('ix_time_entry_archive_project_date', table_name='time_entry_archive')
+    op.drop_index('ix_time_entry_archive_user_date', table_name='time_entry_archive')
+    op.drop_table('time_entry_archive')
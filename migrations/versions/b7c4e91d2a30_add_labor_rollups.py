@@ -0,0 +1,48 @@
+"""add daily/weekly labor rollup tables
+Revision ID: b7c4e91d2a30
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7c4e91d2a30'
+down_revision = 'a1b2c3d4e5f6'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'labor_rollup_daily',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('project.id'), nullable=True),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('hours', sa.Float(), nullable=False),
+        sa.Column('labor_cost', sa.Float(), nullable=False),
+        sa.Column('total_cost', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_labor_rollup_daily_work_date', 'labor_rollup_daily', ['work_date'])
+    op.create_index('ix_rollup_daily_user_date', 'labor_rollup_daily', ['user_id', 'work_date'])
+
+    op.create_table(
+        'labor_rollup_weekly',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('project.id'), nullable=True),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('hours', sa.Float(), nullable=False),
+        sa.Column('labor_cost', sa.Float(), nullable=False),
+        sa.Column('total_cost', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_labor_rollup_weekly_week_start', 'labor_rollup_weekly', ['week_start'])
+    op.create_index('ix_rollup_weekly_user_week', 'labor_rollup_weekly', ['user_id', 'week_start'])
+
+def downgrade():
+    op.drop_index('ix_rollup_weekly_user_week', table_name='labor_rollup_weekly')
+    op.drop_index('ix_labor_rollup_weekly_week_start', table_name='labor_rollup_weekly')
+    op.drop_table('labor_rollup_weekly')
+    op.drop_index('ix_rollup_daily_user_date', table_name='labor_rollup_daily')
+    op.drop_index('ix_labor_rollup_daily_work_date', table_name='labor_rollup_daily')
+    op.drop_table('labor_rollup_daily')
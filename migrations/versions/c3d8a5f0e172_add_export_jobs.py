@@ -0,0 +1,35 @@
+"""add export_job table for background exports
+Revision ID: c3d8a5f0e172
+Revises: b7c4e91d2a30
+Create Date: 2026-10-18 11:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3d8a5f0e172'
+down_revision = 'b7c4e91d2a30'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'export_job',
+        sa.Column('id', sa.String(32), primary_key=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('file_path', sa.String(500), nullable=True),
+        sa.Column('download_name', sa.String(255), nullable=True),
+        sa.Column('mimetype', sa.String(100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_export_job_status', 'export_job', ['status'])
+
+def downgrade():
+    op.drop_index('ix_export_job_status', table_name='export_job')
+    op.drop_table('export_job')
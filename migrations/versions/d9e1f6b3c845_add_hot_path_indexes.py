@@ -0,0 +1,26 @@
+"""add composite indexes for timesheet/report access paths and change_log
+Revision ID: d9e1f6b3c845
+Revises: c3d8a5f0e172
+Create Date: 2026-10-18 13:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd9e1f6b3c845'
+down_revision = 'c3d8a5f0e172'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_time_entry_user_date_project', 'time_entry', ['user_id', 'work_date', 'project_id'],
+                    postgresql_include=['hours'])
+    op.create_index('ix_time_entry_project_date', 'time_entry', ['project_id', 'work_date'])
+    op.create_index('ix_change_log_record', 'change_log', ['table_name', 'record_id'])
+    op.create_index('ix_change_log_action_timestamp', 'change_log', ['action', 'timestamp'])
+
+def downgrade():
+    op.drop_index('ix_change_log_action_timestamp', table_name='change_log')
+    op.drop_index('ix_change_log_record', table_name='change_log')
+    op.drop_index('ix_time_entry_project_date', table_name='time_entry')
+    op.drop_index('ix_time_entry_user_date_project', table_name='time_entry')
@@ -0,0 +1,19 @@
+"""add settings_version to global_settings for the settings cache
+Revision ID: e4a7c2d9b516
+Revises: d9e1f6b3c845
+Create Date: 2026-10-18 14:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c2d9b516'
+down_revision = 'd9e1f6b3c845'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('global_settings', sa.Column('settings_version', sa.Integer(), nullable=False, server_default='1'))
+
+def downgrade():
+    op.drop_column('global_settings', 'settings_version')
@@ -0,0 +1,42 @@
+"""add recost_run table for checkpointed retroactive re-costing
+Revision ID: f2b8d4a6c913
+Revises: e4a7c2d9b516
+Create Date: 2026-10-18 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4a6c913'
+down_revision = 'e4a7c2d9b516'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'recost_run',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('burden_percent', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('cursor_user_id', sa.Integer(), nullable=True),
+        sa.Column('cursor_work_date', sa.Date(), nullable=True),
+        sa.Column('cursor_entry_id', sa.Integer(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=True),
+        sa.Column('changed', sa.Integer(), nullable=True),
+        sa.Column('labor_delta', sa.Float(), nullable=True),
+        sa.Column('total_delta', sa.Float(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_recost_run_status', 'recost_run', ['status'])
+
+def downgrade():
+    op.drop_index('ix_recost_run_status', table_name='recost_run')
+    op.drop_table('recost_run')